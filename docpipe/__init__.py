@@ -0,0 +1 @@
+"""Shared plumbing for the converter scripts in ppt_pdf_ppt/, test2/ and texcode/."""
@@ -0,0 +1,5 @@
+import sys
+
+from docpipe.cli import main
+
+sys.exit(main())
@@ -0,0 +1,108 @@
+"""Synthetic layout-JSON generator and memory/speed benchmark for the layout model.
+
+    python -m docpipe.benchmark --slides 2000 [--write big.json]
+
+Builds a deck-shaped layout (text shapes with paragraphs and runs, plus
+images), then compares plain dicts against the slotted model: retained
+memory (tracemalloc) and JSON / binary encode and decode times.
+"""
+import gc
+import sys
+import time
+import json
+import random
+import argparse
+import tracemalloc
+
+from docpipe.layout_model import (PresentationData, SlideData, ShapeData, TextFrameData, ParagraphData, RunData,
+                                  ImageData, dumps_binary, loads_binary, save_presentation)
+
+WORDS = ("quarterly revenue growth market share pipeline forecast customer retention strategy roadmap "
+         "launch budget headcount margin region product platform partner risk milestone").split()
+
+def generate_presentation(slides=500, text_shapes=4, paragraphs=3, runs=3, images=1, seed=0):
+    rng = random.Random(seed)
+    presentation = PresentationData(12192000, 6858000)
+    for number in range(1, slides + 1):
+        slide = SlideData(number)
+        for index in range(text_shapes):
+            frame = TextFrameData([], None, 7.2, 7.2, 3.6, 3.6)
+            for _ in range(paragraphs):
+                frame.paragraphs.append(ParagraphData(rng.choice((None, "left", "center")), [
+                    RunData(" ".join(rng.choices(WORDS, k=rng.randint(2, 8))) + " ",
+                            rng.choice((None, 18.0, 24.0)), rng.choice((None, "Calibri")),
+                            rng.choice((None, True)), None, None)
+                    for _ in range(runs)]))
+            content = "".join(run.text for p in frame.paragraphs for run in p.runs).strip()
+            slide.shapes.append(ShapeData("text", f"TextBox {index + 1}", rng.uniform(0, 600), rng.uniform(0, 400),
+                                          rng.uniform(100, 600), rng.uniform(30, 300), content, frame))
+        for index in range(images):
+            filename = f"slide{number}_img_{rng.getrandbits(32):08x}.png"
+            slide.shapes.append(ShapeData("image", f"Picture {index + 1}", rng.uniform(0, 600), rng.uniform(0, 400),
+                                          rng.uniform(50, 300), rng.uniform(50, 300),
+                                          image=ImageData("image/png", "png", filename, "/tmp/extracted/" + filename,
+                                                          "A" * 800, "image/webp")))
+        presentation.slides.append(slide)
+    return presentation
+
+def retained_bytes(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, after - before
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+def run_benchmark(slides=500, text_shapes=4, paragraphs=3, runs=3, images=1):
+    presentation = generate_presentation(slides, text_shapes, paragraphs, runs, images)
+    text = json.dumps(presentation.to_dict(), ensure_ascii=False)
+    binary = dumps_binary(presentation)
+
+    _, dict_bytes = retained_bytes(lambda: json.loads(text))
+    _, model_bytes = retained_bytes(lambda: PresentationData.from_dict(json.loads(text)))
+    _, json_dict_time = timed(lambda: json.loads(text))
+    _, json_model_time = timed(lambda: PresentationData.from_dict(json.loads(text)))
+    plain = json.loads(text)
+    _, dict_dump_time = timed(lambda: json.dumps(plain, ensure_ascii=False))
+    _, dump_time = timed(lambda: json.dumps(presentation.to_dict(), ensure_ascii=False))
+    _, binary_dump_time = timed(lambda: dumps_binary(presentation))
+    _, binary_load_time = timed(lambda: loads_binary(binary))
+
+    shapes = slides * (text_shapes + images)
+    print(f"{slides} slides, {shapes} shapes, JSON {len(text) / 1e6:.1f} MB, binary {len(binary) / 1e6:.1f} MB")
+    print(f"  retained memory   dicts {dict_bytes / 1e6:8.1f} MB   model {model_bytes / 1e6:8.1f} MB"
+          f"   ({100 * (1 - model_bytes / dict_bytes):.0f}% less)")
+    print(f"  load JSON         dicts {json_dict_time * 1e3:8.1f} ms   model {json_model_time * 1e3:8.1f} ms")
+    print(f"  dump JSON         dicts {dict_dump_time * 1e3:8.1f} ms   model {dump_time * 1e3:8.1f} ms")
+    print(f"  binary            dump  {binary_dump_time * 1e3:8.1f} ms   load  {binary_load_time * 1e3:8.1f} ms")
+    return presentation
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the layout model on a generated deck.")
+    parser.add_argument("--slides", type=int, default=500)
+    parser.add_argument("--text-shapes", type=int, default=4)
+    parser.add_argument("--paragraphs", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--images", type=int, default=1)
+    parser.add_argument("--write", metavar="PATH", help="also save the generated layout JSON here")
+    args = parser.parse_args(argv)
+
+    presentation = run_benchmark(args.slides, args.text_shapes, args.paragraphs, args.runs, args.images)
+    if args.write:
+        save_presentation(presentation, args.write)
+        print(f"✅ Generated layout JSON saved to: {args.write}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""Single command-line entry point for every converter.
+
+    python -m docpipe <command> --help
+
+Only argparse is imported up front. Each command loads its converter script
+(and with it python-pptx, fitz, python-docx or Pillow) when it runs.
+"""
+import os
+import sys
+import json
+import argparse
+
+from docpipe.converters import load_script
+
+def print_event(event):
+    sys.stderr.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+def _on_event(args):
+    return print_event if args.progress else None
+
+def _blank_layout(args):
+    load_script("ppt_pdf_ppt/pp.py").convert_to_blank_layout(args.input, args.output, args.xml_level, args.media_level)
+
+def _shapes_json(args):
+    load_script("test2/pp.py").extract_shapes_to_json(args.input, args.output, args.blank_output)
+
+def _combine_images(args):
+    load_script("ppt_pdf_ppt/pp1.py").combine_blank_with_images(
+        args.blank_json, args.pptx, args.output, args.image_dir)
+
+def _extract(args):
+    load_script("ppt_pdf_ppt/pp1111.py").extract_combined_ppt_data(
+        args.text_pptx, args.image_pptx or args.text_pptx, args.output, args.image_dir,
+        memory_budget_mb=args.memory_budget_mb,
+        thumbnail_max_edge=args.thumbnail_max_edge or None,
+        thumbnail_format=args.thumbnail_format,
+        slides=args.slides,
+        on_event=_on_event(args),
+        text_only=args.text_only)
+
+def _to_pdf(args):
+    load_script("ppt_pdf_ppt/pp1111.py").convert_pptx_to_pdf(args.pptx, args.output, on_event=_on_event(args))
+
+def _attach_lines(args):
+    load_script("ppt_pdf_ppt/pp2.py").attach_rendered_lines(args.json, args.pdf, args.output, slides=args.slides)
+
+def _layout_lines(args):
+    load_script("ppt_pdf_ppt/line_layout.py").attach_computed_lines(
+        args.json, args.output, args.slides, args.pdf, font_dirs=args.font_dirs)
+
+def _rebuild(args):
+    load_script("ppt_pdf_ppt/pp3.py").create_ppt_from_json_with_zip(
+        args.json, args.zip, args.output, image_dpi=args.image_dpi, slides=args.slides,
+        template_path=args.template, layout_name=args.layout, xml_level=args.xml_level, media_level=args.media_level,
+        on_event=_on_event(args), workers=args.workers)
+
+def _build_simple(args):
+    module = load_script("test2/pp2.py")
+    if args.zip:
+        module.extract_images_from_zip(args.zip, args.images_dir)
+    module.build_pptx_from_json(args.json, args.images_dir, args.output, image_dpi=args.image_dpi,
+                                template_path=args.template, layout_name=args.layout,
+                                xml_level=args.xml_level, media_level=args.media_level, on_event=_on_event(args))
+
+def _docx_json(args):
+    module = load_script("test2/git.py")
+    if (len(args.paths) == 1 and not os.path.isdir(args.paths[0]) and not args.ndjson and not args.out_dir
+            and args.output):
+        module.write_json_atomic(module.extract_docx_to_json(args.paths[0], on_event=_on_event(args),
+                                                             text_only=args.text_only), args.output)
+        print(f"✅ JSON exported to {args.output}")
+        return 0
+    ndjson_path = args.ndjson or (None if args.out_dir else "-")
+    return 1 if module.run_batch(args.paths, ndjson_path, args.out_dir, args.workers, args.text_only) else 0
+
+def _docx_latex(args):
+    load_script("texcode/p.py").docx_to_latex(args.docx, args.output, on_event=_on_event(args))
+
+def _latex_docx(args):
+    module = load_script("texcode/final.py")
+    if len(args.sources) == 1 and args.output:
+        return 0 if module.latex_to_docx(args.sources[0], args.output, args.image_dir, args.timeout,
+                                         on_event=_on_event(args)) else 1
+    results = module.latex_to_docx_many(args.sources, args.output_dir, args.image_dir, args.workers, args.timeout)
+    return 0 if all(results.values()) else 1
+
+def _tex_pdf(args):
+    module = load_script("texcode/tex_build.py")
+    results = module.build_pdfs(list(module.iter_tex_paths(args.paths)), args.output_dir,
+                                workers=args.workers, timeout=args.timeout, use_format=not args.no_format)
+    return 0 if all(results.values()) else 1
+
+def _visual_diff(args):
+    report = load_script("ppt_pdf_ppt/visual_diff.py").compare_decks(
+        args.original, args.rebuilt, args.output_dir, args.dpi, args.workers, heatmaps=not args.no_heatmaps)
+    print(f"✅ Max slide score {report['max_score']:.4f}, report in {args.output_dir}")
+    if args.fail_above is not None and (report["max_score"] > args.fail_above
+                                        or report["original_pages"] != report["rebuilt_pages"]):
+        return 1
+    return 0
+
+def _serve(args):
+    from docpipe import service
+    service.serve(args.host, args.port, args.workers, args.max_queue, args.artifact_dir, args.artifact_ttl)
+
+def _watch(args):
+    from docpipe import hot_folder
+    hot_folder.watch(args.input_dir, args.output_dir, args.workers, args.settle, args.poll_interval,
+                     use_inotify=not args.poll, once=args.once)
+
+def _index(args):
+    from docpipe.search_index import SearchIndex
+    with SearchIndex(args.db) as index:
+        if args.remove:
+            removed = sum(index.remove(path) for path in args.remove)
+            print(f"✅ Removed {removed} document(s) from {args.db}")
+        if args.paths:
+            indexed, skipped = index.update(args.paths)
+            print(f"✅ Indexed {indexed} document(s), {skipped} unchanged or skipped")
+        if args.prune:
+            print(f"✅ Pruned {index.prune()} missing document(s)")
+
+def _search(args):
+    from docpipe.search_index import SearchIndex
+    with SearchIndex(args.db) as index:
+        hits = index.search(args.query, args.limit)
+    for hit in hits:
+        where = f"slide {hit['slide']}, " if hit["slide"] is not None else ""
+        print(f"{hit['path']}: {where}{hit['shape']}, paragraph {hit['paragraph']}")
+    return 0 if hits else 1
+
+def add_compression_args(p):
+    p.add_argument("--xml-level", type=int, default=6, help="deflate level for XML parts, 0 stores them")
+    p.add_argument("--media-level", type=int, default=0, help="deflate level for media, 0 stores them")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="docpipe", description="PPTX/PDF/DOCX/LaTeX conversion tools.")
+    parser.add_argument("--progress", action="store_true", help="print progress events as JSON lines on stderr")
+    commands = parser.add_subparsers(dest="command", metavar="<command>")
+    commands.required = True
+
+    p = commands.add_parser("blank-layout", help="copy every slide onto the blank layout")
+    p.add_argument("input")
+    p.add_argument("output")
+    add_compression_args(p)
+    p.set_defaults(func=_blank_layout)
+
+    p = commands.add_parser("shapes-json", help="dump shape positions and write a placeholder deck")
+    p.add_argument("input")
+    p.add_argument("-o", "--output", default="blank_structure.json")
+    p.add_argument("--blank-output", default="input_blank.pptx")
+    p.set_defaults(func=_shapes_json)
+
+    p = commands.add_parser("combine-images", help="add extracted images to a shapes JSON")
+    p.add_argument("blank_json")
+    p.add_argument("pptx")
+    p.add_argument("-o", "--output", default="output_data.json")
+    p.add_argument("--image-dir", default="extracted_images")
+    p.set_defaults(func=_combine_images)
+
+    p = commands.add_parser("extract", help="PPTX -> layout JSON + image zip")
+    p.add_argument("text_pptx")
+    p.add_argument("image_pptx", nargs="?", help="deck to take images from (default: text_pptx)")
+    p.add_argument("-o", "--output", default="output_data.json")
+    p.add_argument("--image-dir", default="extracted_images")
+    p.add_argument("--slides", help='slide selection, e.g. "40-55" or "1,3,7-9"')
+    p.add_argument("--memory-budget-mb", type=float)
+    p.add_argument("--thumbnail-max-edge", type=int, default=120, help="0 embeds full-size images")
+    p.add_argument("--thumbnail-format", choices=["webp", "jpeg"], default="webp")
+    p.add_argument("--text-only", action="store_true", help="text and structure only: no images, styles or margins")
+    p.set_defaults(func=_extract)
+
+    p = commands.add_parser("to-pdf", help="render a PPTX to PDF with LibreOffice")
+    p.add_argument("pptx")
+    p.add_argument("-o", "--output")
+    p.set_defaults(func=_to_pdf)
+
+    p = commands.add_parser("attach-lines", help="attach rendered PDF line breaks to a layout JSON")
+    p.add_argument("json")
+    p.add_argument("pdf")
+    p.add_argument("-o", "--output", default="output_with_layout.json")
+    p.add_argument("--slides")
+    p.set_defaults(func=_attach_lines)
+
+    p = commands.add_parser("layout-lines", help="compute line breaks from font metrics (no PDF render)")
+    p.add_argument("json")
+    p.add_argument("-o", "--output", default="output_with_layout.json")
+    p.add_argument("--slides")
+    p.add_argument("--pdf", help="rendered PDF to validate against and fall back to")
+    p.add_argument("--font-dir", action="append", dest="font_dirs")
+    p.set_defaults(func=_layout_lines)
+
+    p = commands.add_parser("rebuild", help="layout JSON + image zip -> PPTX")
+    p.add_argument("json")
+    p.add_argument("zip")
+    p.add_argument("-o", "--output", default="rebuilt_presentation.pptx")
+    p.add_argument("--image-dpi", type=int, help="downsample images to this DPI at their placed size")
+    p.add_argument("--slides")
+    p.add_argument("--template", help="deck whose masters and theme the rebuild uses")
+    p.add_argument("--layout", default="Blank", help="name of the template layout for rebuilt slides")
+    p.add_argument("-j", "--workers", type=int, help="generate slides in this many processes")
+    add_compression_args(p)
+    p.set_defaults(func=_rebuild)
+
+    p = commands.add_parser("build-simple", help="plain-text rebuild from a layout JSON and image folder")
+    p.add_argument("json")
+    p.add_argument("images_dir")
+    p.add_argument("--zip", help="unpack this image zip into images_dir first")
+    p.add_argument("-o", "--output", default="rebuilt_presentation.pptx")
+    p.add_argument("--image-dpi", type=int)
+    p.add_argument("--template")
+    p.add_argument("--layout", default="Blank")
+    add_compression_args(p)
+    p.set_defaults(func=_build_simple)
+
+    p = commands.add_parser("docx-json", help="DOCX -> JSON (single file or batch NDJSON)")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("-o", "--output", help="output path for a single file")
+    p.add_argument("--ndjson", metavar="PATH", help="'-' for stdout")
+    p.add_argument("--out-dir")
+    p.add_argument("-j", "--workers", type=int)
+    p.add_argument("--text-only", action="store_true", help="text and structure only: no images or run styles")
+    p.set_defaults(func=_docx_json)
+
+    p = commands.add_parser("docx-latex", help="DOCX -> LaTeX")
+    p.add_argument("docx")
+    p.add_argument("-o", "--output", default="output.tex")
+    p.set_defaults(func=_docx_latex)
+
+    p = commands.add_parser("latex-docx", help="LaTeX -> DOCX with pandoc")
+    p.add_argument("sources", nargs="+", help=".tex files or directories")
+    p.add_argument("-o", "--output", help="output path for a single file")
+    p.add_argument("--output-dir", default="converted")
+    p.add_argument("--image-dir", default="images")
+    p.add_argument("-j", "--workers", type=int)
+    p.add_argument("--timeout", type=int, default=300)
+    p.set_defaults(func=_latex_docx)
+
+    p = commands.add_parser("tex-pdf", help="compile generated LaTeX to PDF with a cached preamble")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("-o", "--output-dir")
+    p.add_argument("-j", "--workers", type=int)
+    p.add_argument("--timeout", type=int, default=120)
+    p.add_argument("--no-format", action="store_true")
+    p.set_defaults(func=_tex_pdf)
+
+    p = commands.add_parser("visual-diff", help="pixel-diff an original deck against its rebuild")
+    p.add_argument("original", help="original .pptx or .pdf")
+    p.add_argument("rebuilt", help="rebuilt .pptx or .pdf")
+    p.add_argument("-o", "--output-dir", default="visual_diff")
+    p.add_argument("--dpi", type=int, default=30)
+    p.add_argument("-j", "--workers", type=int)
+    p.add_argument("--fail-above", type=float)
+    p.add_argument("--no-heatmaps", action="store_true")
+    p.set_defaults(func=_visual_diff)
+
+    p = commands.add_parser("serve", help="run the local HTTP conversion service")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("-j", "--workers", type=int, default=2)
+    p.add_argument("--max-queue", type=int, default=16)
+    p.add_argument("--artifact-dir")
+    p.add_argument("--artifact-ttl", type=int, default=3600)
+    p.set_defaults(func=_serve)
+
+    p = commands.add_parser("watch", help="convert decks and Word files dropped into a folder")
+    p.add_argument("input_dir")
+    p.add_argument("-o", "--output-dir", default="converted")
+    p.add_argument("-j", "--workers", type=int, default=2)
+    p.add_argument("--settle", type=float, default=2.0, help="seconds a file must stay unchanged before conversion")
+    p.add_argument("--poll", action="store_true", help="rescan the folder instead of using inotify")
+    p.add_argument("--poll-interval", type=float, default=2.0)
+    p.add_argument("--once", action="store_true", help="convert what is in the folder now, then exit")
+    p.set_defaults(func=_watch)
+
+    p = commands.add_parser("index", help="add extracted JSON files to a full-text index")
+    p.add_argument("db")
+    p.add_argument("paths", nargs="*", help="JSON files or directories")
+    p.add_argument("--remove", nargs="+", metavar="PATH", default=[], help="JSON files to drop from the index")
+    p.add_argument("--prune", action="store_true", help="drop documents whose JSON file is gone")
+    p.set_defaults(func=_index)
+
+    p = commands.add_parser("search", help='query a full-text index: words and "quoted phrases"')
+    p.add_argument("db")
+    p.add_argument("query")
+    p.add_argument("--limit", type=int, default=100)
+    p.set_defaults(func=_search)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args) or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Registry of the converter scripts and a uniform way to run them as jobs.
+
+The scripts live in plain directories (not packages) and several share a file
+name (pp.py, pp1.py, pp2.py), so they are imported by path under unique module
+names. Nothing heavy is imported until a converter is actually loaded.
+"""
+import os
+import sys
+import json
+import importlib.util
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_loaded = {}
+
+def load_script(relative_path):
+    """Import a converter script such as "ppt_pdf_ppt/pp1111.py" and return the module."""
+    if relative_path in _loaded:
+        return _loaded[relative_path]
+
+    path = os.path.join(REPO_ROOT, relative_path)
+    script_dir = os.path.dirname(path)
+    # Scripts import their siblings (and docpipe) the same way they do when run directly
+    for entry in (REPO_ROOT, script_dir):
+        if entry not in sys.path:
+            sys.path.append(entry)
+
+    module_name = "docpipe_script_" + os.path.splitext(relative_path)[0].replace("/", "_").replace(" ", "_")
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    _loaded[relative_path] = module
+    return module
+
+# progress: on_event / cancel for the converters that support them (see docpipe.progress)
+
+def _pptx_layout(params, workdir, **progress):
+    module = load_script("ppt_pdf_ppt/pp1111.py")
+    image_pptx = params["pptx"]
+    text_pptx = params.get("text_pptx", image_pptx)
+    output_json = os.path.join(workdir, "output_data.json")
+    image_dir = os.path.join(workdir, "extracted_images")
+    module.extract_combined_ppt_data(text_pptx, image_pptx, output_json, image_dir,
+                                     text_only=params.get("text_only", False), **progress)
+    return {"json": output_json, "images_zip": image_dir + ".zip"}
+
+def _pdf_layout(params, workdir, **progress):
+    module = load_script("ppt_pdf_ppt/pp2.py")
+    output_json = os.path.join(workdir, "output_with_layout.json")
+    module.attach_rendered_lines(params["json"], params["pdf"], output_json)
+    return {"json": output_json}
+
+def _text_layout(params, workdir, **progress):
+    module = load_script("ppt_pdf_ppt/line_layout.py")
+    output_json = os.path.join(workdir, "output_with_layout.json")
+    module.attach_computed_lines(params["json"], output_json, pdf_path=params.get("pdf"))
+    return {"json": output_json}
+
+def _pptx_rebuild(params, workdir, **progress):
+    module = load_script("ppt_pdf_ppt/pp3.py")
+    output_pptx = os.path.join(workdir, "rebuilt_presentation.pptx")
+    module.create_ppt_from_json_with_zip(params["json"], params["zip"], output_pptx,
+                                         template_path=params.get("template"),
+                                         layout_name=params.get("layout", "Blank"),
+                                         workers=params.get("workers"), **progress)
+    return {"pptx": output_pptx}
+
+def _docx_json(params, workdir, **progress):
+    module = load_script("test2/git.py")
+    result = module.extract_docx_to_json(params["docx"], text_only=params.get("text_only", False), **progress)
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    output_json = os.path.join(workdir, "output.json")
+    with open(output_json, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    return {"json": output_json}
+
+def _docx_latex(params, workdir, **progress):
+    module = load_script("texcode/p.py")
+    output_tex = os.path.join(workdir, "output.tex")
+    module.docx_to_latex(params["docx"], output_tex, **progress)
+    return {"tex": output_tex}
+
+def _latex_docx(params, workdir, **progress):
+    module = load_script("texcode/final.py")
+    output_docx = os.path.join(workdir, "output.docx")
+    if not module.latex_to_docx(params["tex"], output_docx, params.get("image_dir", "images"),
+                                params.get("timeout"), **progress):
+        raise RuntimeError("pandoc conversion failed")
+    return {"docx": output_docx}
+
+# kind -> (runner, required params)
+JOB_KINDS = {
+    "pptx_layout": (_pptx_layout, ("pptx",)),
+    "pdf_layout": (_pdf_layout, ("json", "pdf")),
+    "text_layout": (_text_layout, ("json",)),
+    "pptx_rebuild": (_pptx_rebuild, ("json", "zip")),
+    "docx_json": (_docx_json, ("docx",)),
+    "docx_latex": (_docx_latex, ("docx",)),
+    "latex_docx": (_latex_docx, ("tex",)),
+}
+
+def validate_job(kind, params):
+    if not isinstance(kind, str) or kind not in JOB_KINDS:
+        raise ValueError(f"unknown job kind {kind!r}, expected one of {sorted(JOB_KINDS)}")
+    if not isinstance(params, dict):
+        raise ValueError("params must be a JSON object")
+    missing = [name for name in JOB_KINDS[kind][1] if name not in params]
+    if missing:
+        raise ValueError(f"{kind} job is missing params: {', '.join(missing)}")
+
+def run_job(kind, params, workdir, on_event=None, cancel=None):
+    """Run one conversion into workdir and return {artifact_name: path}."""
+    validate_job(kind, params)
+    os.makedirs(workdir, exist_ok=True)
+    runner = JOB_KINDS[kind][0]
+    artifacts = runner(params, workdir, on_event=on_event, cancel=cancel)
+    return {name: path for name, path in artifacts.items() if os.path.exists(path)}
+
+def warm_up():
+    """Pay the heavy imports once, e.g. in a freshly started worker process."""
+    for relative_path in ("ppt_pdf_ppt/pp1111.py", "ppt_pdf_ppt/pp2.py", "ppt_pdf_ppt/pp3.py",
+                          "test2/git.py", "texcode/p.py", "texcode/final.py"):
+        try:
+            load_script(relative_path)
+        except ImportError as e:
+            print(f"⚠️ Could not preload {relative_path}: {e}", file=sys.stderr)
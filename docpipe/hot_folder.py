@@ -0,0 +1,307 @@
+"""Watch a drop folder and convert new or changed decks and Word files.
+
+    python -m docpipe watch inbox/ -o converted/ -j 4
+
+    deck.pptx   -> converted/deck_pptx/output_data.json, extracted_images.zip
+    report.docx -> converted/report_docx/output.json, output.tex
+
+Changes are picked up with inotify (through ctypes, Linux only) or, where
+that is unavailable, by rescanning the folder every poll_interval seconds. A
+file is converted once its size and mtime have stayed the same for `settle`
+seconds, so copies still in progress are not picked up half-written. The
+SHA-256 of every converted file is kept in a ledger in the output folder and
+content that was already converted is skipped, also across restarts.
+
+Each file is converted into its own hidden version directory
+(.deck_pptx.<hash>.<id>), which is never moved afterwards, so the saved_path
+values in the JSON stay valid. When every job has finished, the output name
+(deck_pptx) is a symlink that is switched to the new version with one
+os.replace, so readers only ever see a complete result; the previous version
+is deleted right after the switch.
+"""
+import os
+import sys
+import json
+import time
+import select
+import shutil
+import struct
+import ctypes
+import ctypes.util
+import uuid
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from docpipe import converters
+
+# extension -> job kinds run for it (see converters.JOB_KINDS)
+HOT_FOLDER_JOBS = {
+    ".pptx": ("pptx_layout",),
+    ".docx": ("docx_json", "docx_latex"),
+}
+LEDGER_NAME = ".hot_folder_ledger.json"
+
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+def is_candidate(name):
+    # Skip hidden files and Office lock files (~$deck.pptx)
+    if name.startswith((".", "~$")):
+        return False
+    return os.path.splitext(name)[1].lower() in HOT_FOLDER_JOBS
+
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class InotifyWatcher:
+    """Names of candidate files in one directory that were written, moved in or removed."""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch failed for {directory}")
+        self.directory = directory
+
+    def wait(self, timeout):
+        """Return the changed names, or None if events were lost and the folder must be rescanned."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return set()
+
+        names = set()
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if not mask & IN_ISDIR and is_candidate(name):
+                names.add(name)
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Fallback for platforms or filesystems without inotify (e.g. network shares)."""
+
+    def __init__(self, directory, poll_interval=2.0):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self._signatures = {}
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.poll_interval))
+        signatures = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if is_candidate(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    signatures[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        changed = {name for name in signatures.keys() | self._signatures.keys()
+                   if signatures.get(name) != self._signatures.get(name)}
+        self._signatures = signatures
+        return changed
+
+    def close(self):
+        pass
+
+def make_watcher(directory, poll_interval=2.0, use_inotify=True):
+    if use_inotify and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️ inotify unavailable ({e}), polling {directory} every {poll_interval}s", file=sys.stderr)
+    return PollingWatcher(directory, poll_interval)
+
+def load_ledger(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_ledger(ledger, path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(ledger, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def output_name(filename):
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}_{ext[1:].lower()}"
+
+def convert_file(source_path, version_dir):
+    """Run every job for source_path into version_dir; returns {artifact_name: file name}."""
+    ext = os.path.splitext(source_path)[1].lower()
+    param = ext[1:]  # "pptx" / "docx", as the job kinds expect
+    artifacts = {}
+    for kind in HOT_FOLDER_JOBS[ext]:
+        produced = converters.run_job(kind, {param: source_path}, version_dir)
+        artifacts.update({f"{kind}.{name}": os.path.basename(path) for name, path in produced.items()})
+    return artifacts
+
+def publish(version_dir, final_path):
+    """Point the final_path symlink at version_dir atomically and delete the version it replaced."""
+    old_version = None
+    if os.path.islink(final_path):
+        old_version = os.path.join(os.path.dirname(final_path), os.readlink(final_path))
+    elif os.path.isdir(final_path):
+        # Real directory written by an older version of this module: the one time the
+        # output is briefly missing
+        shutil.rmtree(final_path)
+    tmp_link = f"{version_dir}.link"
+    os.symlink(os.path.basename(version_dir), tmp_link)  # relative, so the output folder can be moved
+    os.replace(tmp_link, final_path)
+    if old_version and os.path.abspath(old_version) != os.path.abspath(version_dir):
+        shutil.rmtree(old_version, ignore_errors=True)
+
+class HotFolder:
+    def __init__(self, input_dir, output_dir, workers=2, settle=2.0, poll_interval=2.0, use_inotify=True):
+        self.input_dir = os.path.abspath(input_dir)
+        self.output_dir = os.path.abspath(output_dir)
+        self.workers = workers
+        self.settle = settle
+        self.max_in_flight = 2 * workers
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.ledger_path = os.path.join(self.output_dir, LEDGER_NAME)
+        self.ledger = load_ledger(self.ledger_path)
+        self.watcher = make_watcher(self.input_dir, poll_interval, use_inotify)
+        self._pending = {}   # name -> (signature, monotonic time the signature was last seen to change)
+        self._running = {}   # future -> (name, digest, version dir)
+        self._pool = ProcessPoolExecutor(max_workers=workers, initializer=converters.warm_up)
+
+    def scan(self):
+        with os.scandir(self.input_dir) as entries:
+            for entry in entries:
+                if is_candidate(entry.name) and entry.is_file():
+                    self.touch(entry.name)
+
+    def touch(self, name):
+        self._pending[name] = (file_signature(os.path.join(self.input_dir, name)), time.monotonic())
+
+    def _dispatch_settled(self):
+        now = time.monotonic()
+        busy = {name for name, _, _ in self._running.values()}
+        for name, (signature, since) in list(self._pending.items()):
+            if len(self._running) >= self.max_in_flight:
+                break
+            if name in busy:
+                continue  # picked up again once the running conversion has finished
+            current = file_signature(os.path.join(self.input_dir, name))
+            if current is None:
+                del self._pending[name]
+            elif current != signature:
+                self._pending[name] = (current, now)
+            elif now - since >= self.settle:
+                del self._pending[name]
+                self._submit(name)
+
+    def _submit(self, name):
+        path = os.path.join(self.input_dir, name)
+        try:
+            digest = file_sha256(path)
+        except FileNotFoundError:
+            return
+        running = {d: n for n, d, _ in self._running.values()}
+        if digest in self.ledger or digest in running:
+            source = self.ledger[digest]["source"] if digest in self.ledger else running[digest]
+            if source != name:
+                print(f"⚠️ Skipping {name}: same content as {source}")
+            return
+
+        version_dir = os.path.join(self.output_dir, f".{output_name(name)}.{digest[:12]}.{uuid.uuid4().hex[:8]}")
+        try:
+            future = self._pool.submit(convert_file, path, version_dir)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); replace the pool and retry once
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=converters.warm_up)
+            future = self._pool.submit(convert_file, path, version_dir)
+        self._running[future] = (name, digest, version_dir)
+        print(f"🔄 Converting {name}")
+
+    def _collect(self, timeout=0):
+        if not self._running:
+            return
+        done, _ = wait(list(self._running), timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            name, digest, version_dir = self._running.pop(future)
+            record = {"source": name, "finished": time.time()}
+            try:
+                artifacts = future.result()
+                final_path = os.path.join(self.output_dir, output_name(name))
+                publish(version_dir, final_path)
+                record.update(output=os.path.basename(final_path), artifacts=artifacts)
+                print(f"✅ {name} -> {final_path}")
+            except Exception as e:
+                shutil.rmtree(version_dir, ignore_errors=True)
+                # Recorded like a success so the same bytes are not retried on every restart;
+                # saving a fixed file changes its hash and converts it again
+                record["error"] = f"{type(e).__name__}: {e}"
+                print(f"❌ {name}: {record['error']}")
+            self.ledger[digest] = record
+            save_ledger(self.ledger, self.ledger_path)
+
+    def run(self, once=False):
+        """Convert what is already in the folder, then keep watching (or return, with once=True)."""
+        self.scan()
+        try:
+            while True:
+                self._dispatch_settled()
+                if once:
+                    if not self._pending and not self._running:
+                        return
+                    if not self._running:
+                        time.sleep(0.2)
+                else:
+                    names = self.watcher.wait(0.2 if self._pending or self._running else 1.0)
+                    if names is None:
+                        self.scan()
+                    else:
+                        for name in names:
+                            self.touch(name)
+                self._collect(timeout=0.2 if once else 0)
+        finally:
+            self.close()
+
+    def close(self):
+        self.watcher.close()
+        self._pool.shutdown(cancel_futures=True)
+
+def watch(input_dir, output_dir, workers=2, settle=2.0, poll_interval=2.0, use_inotify=True, once=False):
+    hot_folder = HotFolder(input_dir, output_dir, workers, settle, poll_interval, use_inotify)
+    print(f"✅ Watching {hot_folder.input_dir} -> {hot_folder.output_dir} ({workers} workers)")
+    try:
+        hot_folder.run(once)
+    except KeyboardInterrupt:
+        pass
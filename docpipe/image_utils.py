@@ -0,0 +1,164 @@
+"""Pillow helpers shared by the extraction and rebuild scripts."""
+import io
+import math
+import os
+import base64
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", "image/webp", "webp"),
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+    "jpg": ("JPEG", "image/jpeg", "jpg"),
+}
+
+def image_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def thumbnail_content_type(fmt="webp"):
+    return THUMBNAIL_FORMATS[fmt.lower()][1]
+
+def make_thumbnail(data, max_edge=120, fmt="webp", quality=80, cache_dir=None):
+    """Return encoded thumbnail bytes whose longest edge is at most max_edge pixels.
+
+    Results are cached under cache_dir by source hash, edge and format. Returns
+    None for images Pillow cannot decode (e.g. EMF/WMF off Windows).
+    """
+    pil_format, _, ext = THUMBNAIL_FORMATS[fmt.lower()]
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"{image_digest(data)}_{max_edge}_q{quality}.{ext}")
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                return f.read()
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            # For JPEG sources this decodes at a reduced scale instead of full size
+            img.draft("RGB", (max_edge, max_edge))
+            img.thumbnail((max_edge, max_edge))
+            if pil_format == "JPEG":
+                if img.mode in ("RGBA", "LA", "P"):
+                    rgba = img.convert("RGBA")
+                    img = Image.new("RGB", rgba.size, (255, 255, 255))
+                    img.paste(rgba, mask=rgba.getchannel("A"))
+                elif img.mode != "RGB":
+                    img = img.convert("RGB")
+            elif img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA")
+            out = io.BytesIO()
+            img.save(out, format=pil_format, quality=quality)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not create thumbnail: {e}")
+        return None
+
+    thumbnail = out.getvalue()
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        _write_atomic(cache_path, thumbnail)
+    return thumbnail
+
+def _set_field(metadata, name, value):
+    # Image metadata is an ImageData in most scripts and a plain dict in pp1.py
+    if isinstance(metadata, dict):
+        metadata[name] = value
+    else:
+        setattr(metadata, name, value)
+
+class ThumbnailJobs:
+    """Fill thumbnail_base64 / thumbnail_content_type of image metadata from a thread pool.
+
+    submit() queues a thumbnail and resolve() writes the finished ones into their
+    metadata. With max_edge=None there is no pool: submit() embeds the original
+    image at once and leaves thumbnail_content_type None.
+    """
+
+    def __init__(self, max_edge=120, fmt="webp", cache_dir=None, workers=None):
+        self.max_edge = max_edge
+        self.fmt = fmt
+        self.cache_dir = cache_dir
+        self._pool = ThreadPoolExecutor(max_workers=workers) if max_edge else None
+        self._pending = []  # (metadata, future)
+
+    def submit(self, metadata, data):
+        """Queue a thumbnail of data for metadata; returns the bytes embedded right away (0 when queued)."""
+        if self._pool is None:
+            encoded = base64.b64encode(data).decode("utf-8")
+            _set_field(metadata, "thumbnail_base64", encoded)
+            _set_field(metadata, "thumbnail_content_type", None)
+            return len(encoded)
+        _set_field(metadata, "thumbnail_content_type", thumbnail_content_type(self.fmt))
+        self._pending.append((metadata, self._pool.submit(make_thumbnail, data, self.max_edge, self.fmt,
+                                                          cache_dir=self.cache_dir)))
+        return 0
+
+    def resolve(self):
+        for metadata, future in self._pending:
+            thumbnail = future.result()
+            _set_field(metadata, "thumbnail_base64", base64.b64encode(thumbnail).decode("utf-8") if thumbnail else None)
+        self._pending.clear()
+
+    def close(self, cancel=False):
+        """Resolve what is pending and stop the pool; cancel=True drops pending work instead."""
+        if self._pool is None:
+            return
+        if cancel:
+            self._pool.shutdown(cancel_futures=True)
+            self._pending.clear()
+        else:
+            self.resolve()
+            self._pool.shutdown()
+
+# Formats that are re-encoded when downsampled; anything else is embedded as-is
+RESAMPLE_FORMATS = {"JPEG", "PNG"}
+
+def downsample_for_placement(data, width_pt, height_pt, dpi=150, jpeg_quality=85, cache_dir=None):
+    """Return image bytes no larger than needed to show data at dpi in a width_pt x height_pt box.
+
+    Images that already fit, and formats other than JPEG/PNG, are returned
+    unchanged. Results are cached by source hash and target pixel size.
+    """
+    target_w = max(1, math.ceil(width_pt / 72.0 * dpi))
+    target_h = max(1, math.ceil(height_pt / 72.0 * dpi))
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"{image_digest(data)}_{target_w}x{target_h}_q{jpeg_quality}")
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                return f.read()
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            pil_format = img.format
+            scale = max(target_w / img.width, target_h / img.height)
+            if pil_format not in RESAMPLE_FORMATS or scale >= 1 or getattr(img, "is_animated", False):
+                return data
+            new_size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            if pil_format == "JPEG":
+                img.draft(img.mode, new_size)
+            resized = img.resize(new_size, Image.LANCZOS, reducing_gap=3.0)
+            out = io.BytesIO()
+            if pil_format == "JPEG":
+                resized.save(out, format="JPEG", quality=jpeg_quality, icc_profile=img.info.get("icc_profile"))
+            else:
+                resized.save(out, format="PNG")
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not downsample image, embedding original: {e}")
+        return data
+
+    resampled = out.getvalue()
+    if len(resampled) >= len(data):
+        resampled = data
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        _write_atomic(cache_path, resampled)
+    return resampled
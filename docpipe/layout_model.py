@@ -0,0 +1,379 @@
+"""Typed model of the layout JSON passed between the PPTX scripts.
+
+    JSON:   load_presentation / save_presentation, or from_dict / to_dict
+    binary: dumps_binary / loads_binary (marshal of plain tuples)
+
+The classes are slotted dataclasses, so a shape costs one small object with
+fixed attributes instead of a dict plus nested position/size dicts.
+position and size are flattened onto the shape. to_dict writes the keys in the
+order pp1111.py always has, and from_dict remembers a shape's key order when
+it differs, so existing files round-trip unchanged. Keys the model does not
+know are kept in `extra` and written back after the known ones.
+"""
+import json
+import marshal
+from dataclasses import dataclass, field
+
+BINARY_MAGIC = b"DPLM"
+BINARY_VERSION = 1
+
+def _extra(d, keys):
+    if d.keys() <= keys:
+        return None
+    return {k: v for k, v in d.items() if k not in keys}
+
+@dataclass(slots=True)
+class RunData:
+    text: str = ""
+    font_size_pt: float | None = None
+    font_name: str | None = None
+    bold: bool | None = None
+    italic: bool | None = None
+    underline: bool | None = None
+    extra: dict | None = None
+
+    KEYS = frozenset(("text", "font_size_pt", "font_name", "bold", "italic", "underline"))
+
+    @classmethod
+    def from_dict(cls, d):
+        if len(d) == 6:
+            # Fast path for the usual record holding exactly the known keys
+            try:
+                return cls(d["text"], d["font_size_pt"], d["font_name"], d["bold"], d["italic"], d["underline"])
+            except KeyError:
+                pass
+        return cls(d.get("text", ""), d.get("font_size_pt"), d.get("font_name"), d.get("bold"),
+                   d.get("italic"), d.get("underline"), _extra(d, cls.KEYS))
+
+    def to_dict(self):
+        d = {
+            "text": self.text,
+            "font_size_pt": self.font_size_pt,
+            "font_name": self.font_name,
+            "bold": self.bold,
+            "italic": self.italic,
+            "underline": self.underline
+        }
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def to_tuple(self):
+        return (self.text, self.font_size_pt, self.font_name, self.bold, self.italic, self.underline, self.extra)
+
+    @classmethod
+    def from_tuple(cls, t):
+        return cls(*t)
+
+def _runs_from_dicts(runs):
+    # RunData.from_dict's fast path inlined: one constructor call per run, no method call
+    new = RunData
+    try:
+        return [new(r["text"], r["font_size_pt"], r["font_name"], r["bold"], r["italic"], r["underline"])
+                if len(r) == 6 else new.from_dict(r) for r in runs]
+    except KeyError:
+        return [new.from_dict(r) for r in runs]
+
+@dataclass(slots=True)
+class ParagraphData:
+    alignment: str | None = None
+    runs: list = field(default_factory=list)
+    line_spacing: float | None = None
+    space_before: float | None = None
+    space_after: float | None = None
+    extra: dict | None = None
+
+    KEYS = frozenset(("alignment", "runs", "line_spacing", "space_before", "space_after"))
+
+    @property
+    def text(self):
+        return "".join(run.text for run in self.runs)
+
+    @classmethod
+    def from_dict(cls, d):
+        if len(d) == 5:
+            try:
+                return cls(d["alignment"], _runs_from_dicts(d["runs"]), d["line_spacing"],
+                           d["space_before"], d["space_after"])
+            except KeyError:
+                pass
+        return cls(d.get("alignment"), [RunData.from_dict(r) for r in d.get("runs", [])], d.get("line_spacing"),
+                   d.get("space_before"), d.get("space_after"), _extra(d, cls.KEYS))
+
+    def to_dict(self):
+        d = {
+            "alignment": self.alignment,
+            "runs": [run.to_dict() for run in self.runs],
+            "line_spacing": self.line_spacing,
+            "space_before": self.space_before,
+            "space_after": self.space_after
+        }
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def to_tuple(self):
+        return (self.alignment, [run.to_tuple() for run in self.runs], self.line_spacing, self.space_before,
+                self.space_after, self.extra)
+
+    @classmethod
+    def from_tuple(cls, t):
+        return cls(t[0], [RunData.from_tuple(r) for r in t[1]], t[2], t[3], t[4], t[5])
+
+def _paragraphs_from_dicts(paragraphs):
+    new = ParagraphData
+    try:
+        return [new(p["alignment"], _runs_from_dicts(p["runs"]), p["line_spacing"], p["space_before"],
+                    p["space_after"]) if len(p) == 5 else new.from_dict(p) for p in paragraphs]
+    except KeyError:
+        return [new.from_dict(p) for p in paragraphs]
+
+@dataclass(slots=True)
+class TextFrameData:
+    paragraphs: list = field(default_factory=list)
+    vertical_alignment: str | None = None
+    margin_left_pt: float = 0.0
+    margin_right_pt: float = 0.0
+    margin_top_pt: float = 0.0
+    margin_bottom_pt: float = 0.0
+    extra: dict | None = None
+
+    KEYS = frozenset(("paragraphs", "vertical_alignment", "margin_left_pt", "margin_right_pt",
+                      "margin_top_pt", "margin_bottom_pt"))
+
+    @classmethod
+    def from_dict(cls, d):
+        if len(d) == 6:
+            try:
+                return cls(_paragraphs_from_dicts(d["paragraphs"]), d["vertical_alignment"],
+                           d["margin_left_pt"], d["margin_right_pt"], d["margin_top_pt"], d["margin_bottom_pt"])
+            except KeyError:
+                pass
+        return cls([ParagraphData.from_dict(p) for p in d.get("paragraphs", [])], d.get("vertical_alignment"),
+                   d.get("margin_left_pt", 0.0), d.get("margin_right_pt", 0.0), d.get("margin_top_pt", 0.0),
+                   d.get("margin_bottom_pt", 0.0), _extra(d, cls.KEYS))
+
+    def to_dict(self):
+        d = {
+            "paragraphs": [paragraph.to_dict() for paragraph in self.paragraphs],
+            "vertical_alignment": self.vertical_alignment,
+            "margin_left_pt": self.margin_left_pt,
+            "margin_right_pt": self.margin_right_pt,
+            "margin_top_pt": self.margin_top_pt,
+            "margin_bottom_pt": self.margin_bottom_pt
+        }
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def to_tuple(self):
+        return ([p.to_tuple() for p in self.paragraphs], self.vertical_alignment, self.margin_left_pt,
+                self.margin_right_pt, self.margin_top_pt, self.margin_bottom_pt, self.extra)
+
+    @classmethod
+    def from_tuple(cls, t):
+        return cls([ParagraphData.from_tuple(p) for p in t[0]], *t[1:])
+
+@dataclass(slots=True)
+class ImageData:
+    content_type: str | None = None
+    ext: str | None = None
+    filename: str | None = None
+    saved_path: str | None = None
+    thumbnail_base64: str | None = None
+    thumbnail_content_type: str | None = None  # left out of the JSON when None
+    error: str | None = None                   # set instead of the rest when extraction failed
+    extra: dict | None = None
+
+    KEYS = frozenset(("content_type", "ext", "filename", "saved_path", "thumbnail_base64",
+                      "thumbnail_content_type", "error"))
+
+    @classmethod
+    def from_dict(cls, d):
+        if len(d) == 6:
+            try:
+                return cls(d["content_type"], d["ext"], d["filename"], d["saved_path"], d["thumbnail_base64"],
+                           d["thumbnail_content_type"])
+            except KeyError:
+                pass
+        return cls(d.get("content_type"), d.get("ext"), d.get("filename"), d.get("saved_path"),
+                   d.get("thumbnail_base64"), d.get("thumbnail_content_type"), d.get("error"), _extra(d, cls.KEYS))
+
+    def to_dict(self):
+        if self.error is not None:
+            d = {"error": self.error}
+        else:
+            d = {
+                "content_type": self.content_type,
+                "ext": self.ext,
+                "filename": self.filename,
+                "saved_path": self.saved_path,
+                "thumbnail_base64": self.thumbnail_base64
+            }
+            if self.thumbnail_content_type is not None:
+                d["thumbnail_content_type"] = self.thumbnail_content_type
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def to_tuple(self):
+        return (self.content_type, self.ext, self.filename, self.saved_path, self.thumbnail_base64,
+                self.thumbnail_content_type, self.error, self.extra)
+
+    @classmethod
+    def from_tuple(cls, t):
+        return cls(*t)
+
+SHAPE_KEY_ORDER = ("type", "name", "position", "size", "content", "text_properties", "image_metadata",
+                   "rendered_lines")
+_CANONICAL_SHAPE_KEYS = {}  # key tuple of a shape dict -> whether it is in SHAPE_KEY_ORDER order
+
+@dataclass(slots=True)
+class ShapeData:
+    type: str | None = None
+    name: str | None = None
+    x_pt: float = 0.0
+    y_pt: float = 0.0
+    width_pt: float = 0.0
+    height_pt: float = 0.0
+    content: str | None = None            # optional keys below are left out of the JSON when None
+    text: TextFrameData | None = None     # "text_properties"
+    image: ImageData | None = None        # "image_metadata"
+    rendered_lines: list | None = None
+    extra: dict | None = None
+    key_order: tuple | None = None        # only set for JSON written in a different key order
+
+    KEYS = frozenset(SHAPE_KEY_ORDER)
+
+    @classmethod
+    def from_dict(cls, d):
+        position = d.get("position") or {}
+        size = d.get("size") or {}
+        text = d.get("text_properties")
+        image = d.get("image_metadata")
+        shape = cls(d.get("type"), d.get("name"), position.get("x_pt", 0.0), position.get("y_pt", 0.0),
+                    size.get("width_pt", 0.0), size.get("height_pt", 0.0), d.get("content"),
+                    TextFrameData.from_dict(text) if text is not None else None,
+                    ImageData.from_dict(image) if image is not None else None,
+                    d.get("rendered_lines"), _extra(d, cls.KEYS))
+        keys = tuple(d)
+        canonical = _CANONICAL_SHAPE_KEYS.get(keys)
+        if canonical is None:
+            canonical = keys == tuple(k for k in SHAPE_KEY_ORDER if k in d) + tuple(shape.extra or ())
+            if shape.extra is None:  # only orders made of known keys are worth remembering
+                _CANONICAL_SHAPE_KEYS[keys] = canonical
+        if not canonical:
+            shape.key_order = keys
+        return shape
+
+    def to_dict(self):
+        d = {
+            "type": self.type,
+            "name": self.name,
+            "position": {"x_pt": self.x_pt, "y_pt": self.y_pt},
+            "size": {"width_pt": self.width_pt, "height_pt": self.height_pt}
+        }
+        if self.content is not None:
+            d["content"] = self.content
+        if self.text is not None:
+            d["text_properties"] = self.text.to_dict()
+        if self.image is not None:
+            d["image_metadata"] = self.image.to_dict()
+        if self.rendered_lines is not None:
+            d["rendered_lines"] = self.rendered_lines
+        if self.extra:
+            d.update(self.extra)
+        if self.key_order:
+            ordered = {k: d.pop(k) for k in self.key_order if k in d}
+            ordered.update(d)
+            d = ordered
+        return d
+
+    def to_tuple(self):
+        return (self.type, self.name, self.x_pt, self.y_pt, self.width_pt, self.height_pt, self.content,
+                self.text.to_tuple() if self.text is not None else None,
+                self.image.to_tuple() if self.image is not None else None,
+                self.rendered_lines, self.extra, self.key_order)
+
+    @classmethod
+    def from_tuple(cls, t):
+        return cls(*t[:7], TextFrameData.from_tuple(t[7]) if t[7] is not None else None,
+                   ImageData.from_tuple(t[8]) if t[8] is not None else None, *t[9:])
+
+@dataclass(slots=True)
+class SlideData:
+    slide_number: int
+    shapes: list = field(default_factory=list)
+    extra: dict | None = None
+
+    KEYS = frozenset(("slide_number", "shapes"))
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["slide_number"], [ShapeData.from_dict(s) for s in d.get("shapes", [])], _extra(d, cls.KEYS))
+
+    def to_dict(self):
+        d = {
+            "slide_number": self.slide_number,
+            "shapes": [shape.to_dict() for shape in self.shapes]
+        }
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def to_tuple(self):
+        return (self.slide_number, [shape.to_tuple() for shape in self.shapes], self.extra)
+
+    @classmethod
+    def from_tuple(cls, t):
+        return cls(t[0], [ShapeData.from_tuple(s) for s in t[1]], t[2])
+
+@dataclass(slots=True)
+class PresentationData:
+    slide_width_emu: int | None = None
+    slide_height_emu: int | None = None
+    slides: list = field(default_factory=list)
+    extra: dict | None = None
+
+    KEYS = frozenset(("slide_width_emu", "slide_height_emu", "slides"))
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d.get("slide_width_emu"), d.get("slide_height_emu"),
+                   [SlideData.from_dict(s) for s in d.get("slides", [])], _extra(d, cls.KEYS))
+
+    def to_dict(self):
+        d = {}
+        if self.slide_width_emu is not None:
+            d["slide_width_emu"] = self.slide_width_emu
+        if self.slide_height_emu is not None:
+            d["slide_height_emu"] = self.slide_height_emu
+        d["slides"] = [slide.to_dict() for slide in self.slides]
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def to_tuple(self):
+        return (self.slide_width_emu, self.slide_height_emu, [slide.to_tuple() for slide in self.slides], self.extra)
+
+    @classmethod
+    def from_tuple(cls, t):
+        return cls(t[0], t[1], [SlideData.from_tuple(s) for s in t[2]], t[3])
+
+def load_presentation(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return PresentationData.from_dict(json.load(f))
+
+def save_presentation(presentation, path, indent=4):
+    # json.dumps rather than json.dump: with indent=None only the former uses the C encoder
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(presentation.to_dict(), indent=indent, ensure_ascii=False))
+
+def dumps_binary(presentation):
+    """Encode for caches and process hand-off; read back with the same Python version."""
+    return BINARY_MAGIC + bytes([BINARY_VERSION]) + marshal.dumps(presentation.to_tuple())
+
+def loads_binary(data):
+    if data[:4] != BINARY_MAGIC or data[4] != BINARY_VERSION:
+        raise ValueError("not a layout model binary (or written by another version)")
+    return PresentationData.from_tuple(marshal.loads(data[5:]))
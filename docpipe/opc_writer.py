@@ -0,0 +1,214 @@
+"""Zip writer for OPC packages (.pptx, .docx) with per-part compression.
+
+python-pptx and python-docx deflate every part at the default level, including
+JPEG/PNG media that does not shrink. save_pptx / save_docx / save_package write
+the same parts with:
+
+    xml_level    deflate level for XML and .rels parts (0 stores them)
+    media_level  deflate level for everything else (default 0: stored)
+
+Parts are deflated in a thread pool (zlib releases the GIL) and written in
+order as they complete. ZipEntryWriter is the underlying writer and can be fed
+(name, data) entries directly.
+"""
+import os
+import re
+import time
+import zlib
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import quoteattr
+
+CT_RELATIONSHIPS = "application/vnd.openxmlformats-package.relationships+xml"
+CT_XML = "application/xml"
+CONTENT_TYPES_NAME = "[Content_Types].xml"
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP64_LIMIT = 0xFFFFFFFF        # sizes/offsets from here on go into the zip64 extra field
+ZIP64_COUNT_LIMIT = 0xFFFF
+ZIP64_MARKER = 0xFFFFFFFF
+ZIP64_COUNT_MARKER = 0xFFFF
+
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+END_RECORD = struct.Struct("<4s4H2LH")
+ZIP64_END_RECORD = struct.Struct("<4sQ2H2L4Q")
+ZIP64_LOCATOR = struct.Struct("<4sLQL")
+
+def is_xml_name(name):
+    return name.lower().endswith((".xml", ".rels", ".vml"))
+
+def _compress(data, level):
+    crc = zlib.crc32(data)
+    if not level:
+        return crc, data, ZIP_STORED
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    if len(compressed) >= len(data):
+        return crc, data, ZIP_STORED
+    return crc, compressed, ZIP_DEFLATED
+
+def _field(value):
+    return ZIP64_MARKER if value >= ZIP64_LIMIT else value
+
+def _dos_datetime(timestamp):
+    t = time.localtime(timestamp)
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+class ZipEntryWriter:
+    """Write zip entries in order while compressing them concurrently.
+
+    add() hands the data to the pool and returns at once. At most max_pending
+    entries are in flight; older ones are written as soon as they are done.
+    Data may be bytes or any buffer (e.g. a memoryview into a mapped archive).
+    """
+
+    def __init__(self, file, xml_level=6, media_level=0, workers=None, max_pending=None):
+        self._file = file
+        self.xml_level = xml_level
+        self.media_level = media_level
+        self._pool = ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1))
+        self._max_pending = max_pending or 4 * self._pool._max_workers
+        self._pending = deque()
+        self._central = []
+        self._offset = 0
+        self._names = set()
+        self._dos_time, self._dos_date = _dos_datetime(time.time())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self._pool.shutdown(cancel_futures=True)
+
+    def level_for(self, name):
+        return self.xml_level if is_xml_name(name) else self.media_level
+
+    def add(self, name, data, level=None):
+        if name in self._names:
+            raise ValueError(f"duplicate zip entry {name!r}")
+        self._names.add(name)
+        if level is None:
+            level = self.level_for(name)
+        self._pending.append((name, len(data), self._pool.submit(_compress, data, level)))
+        while len(self._pending) > self._max_pending or (self._pending and self._pending[0][2].done()):
+            self._write_entry(*self._pending.popleft())
+
+    def _write_entry(self, name, size, future):
+        crc, payload, method = future.result()
+        encoded_name = name.encode("utf-8")
+        flags = 0 if encoded_name.isascii() else 0x800
+        zip64 = size >= ZIP64_LIMIT or len(payload) >= ZIP64_LIMIT
+        extra = struct.pack("<2H2Q", 1, 16, size, len(payload)) if zip64 else b""
+
+        header = LOCAL_HEADER.pack(b"PK\x03\x04", 45 if zip64 else 20, flags, method, self._dos_time,
+                                   self._dos_date, crc, ZIP64_MARKER if zip64 else len(payload),
+                                   ZIP64_MARKER if zip64 else size, len(encoded_name), len(extra))
+        self._file.write(header)
+        self._file.write(encoded_name)
+        self._file.write(extra)
+        self._file.write(payload)
+        self._central.append((encoded_name, flags, method, crc, len(payload), size, self._offset))
+        self._offset += len(header) + len(encoded_name) + len(extra) + len(payload)
+
+    def close(self):
+        while self._pending:
+            self._write_entry(*self._pending.popleft())
+        self._pool.shutdown()
+
+        cd_offset = self._offset
+        cd_size = 0
+        for encoded_name, flags, method, crc, compressed, size, offset in self._central:
+            fields = [value for value in (size, compressed, offset) if value >= ZIP64_LIMIT]
+            extra = struct.pack(f"<2H{len(fields)}Q", 1, 8 * len(fields), *fields) if fields else b""
+            header = CENTRAL_HEADER.pack(
+                b"PK\x01\x02", 45 if fields else 20, 45 if fields else 20, flags, method, self._dos_time,
+                self._dos_date, crc, _field(compressed), _field(size), len(encoded_name),
+                len(extra), 0, 0, 0, 0, _field(offset))
+            self._file.write(header)
+            self._file.write(encoded_name)
+            self._file.write(extra)
+            cd_size += len(header) + len(encoded_name) + len(extra)
+
+        count = len(self._central)
+        if count >= ZIP64_COUNT_LIMIT or cd_offset >= ZIP64_LIMIT or cd_size >= ZIP64_LIMIT:
+            zip64_end_offset = cd_offset + cd_size
+            self._file.write(ZIP64_END_RECORD.pack(b"PK\x06\x06", ZIP64_END_RECORD.size - 12, 45, 45, 0, 0,
+                                                   count, count, cd_size, cd_offset))
+            self._file.write(ZIP64_LOCATOR.pack(b"PK\x06\x07", 0, zip64_end_offset, 1))
+        count_field = ZIP64_COUNT_MARKER if count >= ZIP64_COUNT_LIMIT else count
+        self._file.write(END_RECORD.pack(b"PK\x05\x06", 0, 0, count_field, count_field, _field(cd_size),
+                                         _field(cd_offset), 0))
+
+def content_types_xml(parts):
+    """[Content_Types].xml for (partname, content_type) pairs: media by extension, the rest as overrides."""
+    defaults = {"rels": CT_RELATIONSHIPS, "xml": CT_XML}
+    overrides = {}
+    for partname, content_type in parts:
+        ext = partname.rsplit(".", 1)[-1].lower() if "." in partname.rsplit("/", 1)[-1] else ""
+        if ext and content_type.startswith(("image/", "audio/", "video/")) and defaults.get(ext, content_type) == content_type:
+            defaults[ext] = content_type
+        elif defaults.get(ext) != content_type:
+            overrides[partname] = content_type
+
+    lines = ['<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+             '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">']
+    lines += [f"<Default Extension={quoteattr(ext)} ContentType={quoteattr(ct)}/>" for ext, ct in sorted(defaults.items())]
+    lines += [f"<Override PartName={quoteattr(name)} ContentType={quoteattr(ct)}/>"
+              for name, ct in sorted(overrides.items())]
+    lines.append("</Types>")
+    return "".join(lines).encode("utf-8")
+
+def iter_package_entries(package):
+    """Yield (zip name, data, partname, content type) for a python-pptx or python-docx package."""
+    parts = list(package.iter_parts())
+    package_rels = package.rels if hasattr(package, "rels") else package._rels  # python-docx / python-pptx
+    for part in parts:
+        if hasattr(part, "before_marshal"):  # python-docx hook
+            part.before_marshal()
+
+    # Parts pulled in from another package (e.g. a slide layout of the source deck) can
+    # share a partname with one already here; give them the next free name instead of
+    # writing two zip entries with the same name
+    seen = set()
+    for part in parts:
+        if str(part.partname) in seen:
+            template = re.sub(r"\d*(\.\w+)$", r"%d\1", str(part.partname))
+            part.partname = package.next_partname(template)
+        seen.add(str(part.partname))
+
+    yield CONTENT_TYPES_NAME, content_types_xml((str(part.partname), part.content_type) for part in parts), None, None
+    yield "_rels/.rels", package_rels.xml, None, None
+    for part in parts:
+        yield part.partname.membername, part.blob, str(part.partname), part.content_type
+        if len(part.rels):
+            yield part.partname.rels_uri.membername, part.rels.xml, None, None
+
+def save_package(package, path_or_file, xml_level=6, media_level=0, workers=None):
+    if hasattr(path_or_file, "write"):
+        with ZipEntryWriter(path_or_file, xml_level, media_level, workers) as writer:
+            for name, data, _, _ in iter_package_entries(package):
+                writer.add(name, data)
+        return
+
+    tmp_path = f"{path_or_file}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f, ZipEntryWriter(f, xml_level, media_level, workers) as writer:
+            for name, data, _, _ in iter_package_entries(package):
+                writer.add(name, data)
+        os.replace(tmp_path, path_or_file)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def save_pptx(prs, path_or_file, xml_level=6, media_level=0, workers=None):
+    save_package(prs.part.package, path_or_file, xml_level, media_level, workers)
+
+def save_docx(document, path_or_file, xml_level=6, media_level=0, workers=None):
+    save_package(document.part.package, path_or_file, xml_level, media_level, workers)
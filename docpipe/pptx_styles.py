@@ -0,0 +1,201 @@
+"""Effective paragraph and run formatting for python-pptx text frames.
+
+python-pptx returns None for run.font.size, paragraph.line_spacing, ...
+whenever the value is inherited. PptxStyleResolver applies, from lowest to
+highest priority:
+
+    presentation defaultTextStyle -> master txStyles (titleStyle / bodyStyle / otherStyle)
+    -> master placeholder lstStyle -> layout placeholder lstStyle -> shape lstStyle
+    -> paragraph pPr / run rPr
+
+picking the lvlNpPr for the paragraph's level at each step. Slide
+placeholders are matched to the layout by idx (then type) and to the master
+by type, as python-pptx does. Theme fonts (+mj-lt, +mn-lt) become the
+master theme's typefaces. Percentage line/paragraph spacing has no size in
+points and is reported as None; normAutofit font scaling is not applied.
+
+The inherited part is computed once per (layout, placeholder, level) and
+cached, so a run only costs a pass over its own <a:rPr>.
+
+    resolver = PptxStyleResolver(presentation)
+    paragraph_properties, run_defaults = resolver.paragraph_properties(shape, paragraph)
+    # {"alignment": "left", "line_spacing": None, "space_before": 10.0, "space_after": 0.0}
+    resolver.run_properties(run_defaults, run)
+    # {"font_size_pt": 28.0, "font_name": "Calibri", "bold": False, "italic": False, "underline": False}
+"""
+from lxml import etree
+from pptx.enum.text import PP_ALIGN
+
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+P_NS = "http://schemas.openxmlformats.org/presentationml/2006/main"
+RT_THEME = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/theme"
+
+def _a(tag):
+    return f"{{{A_NS}}}{tag}"
+
+def _p(tag):
+    return f"{{{P_NS}}}{tag}"
+
+A_LATIN, A_DEF_RPR, A_LST_STYLE, A_SPC_PTS = _a("latin"), _a("defRPr"), _a("lstStyle"), _a("spcPts")
+SPACING = {_a("lnSpc"): "line_spacing", _a("spcBef"): "space_before", _a("spcAft"): "space_after"}
+TRUE_VALUES = ("1", "true", "on")
+
+DEFAULT_PARAGRAPH = {"alignment": "left", "line_spacing": None, "space_before": 0.0, "space_after": 0.0}
+DEFAULT_RUN = {"font_size_pt": 18.0, "font_name": None, "bold": False, "italic": False, "underline": False}
+
+# Slide/layout placeholder type -> master placeholder type, as in python-pptx
+MASTER_PLACEHOLDER_TYPES = {"ctrTitle": "title", "subTitle": "body", "obj": "body", "chart": "body",
+                            "tbl": "body", "clipArt": "body", "dgm": "body", "media": "body", "pic": "body"}
+TX_STYLES = {"title": "titleStyle", "body": "bodyStyle"}  # every other master type uses otherStyle
+
+def read_rpr(rpr, theme_fonts):
+    """Run properties set explicitly on an <a:rPr> / <a:defRPr> element."""
+    properties = {}
+    if rpr is None:
+        return properties
+    get = rpr.get
+    if get("sz") is not None:
+        properties["font_size_pt"] = int(get("sz")) / 100
+    if get("b") is not None:
+        properties["bold"] = get("b") in TRUE_VALUES
+    if get("i") is not None:
+        properties["italic"] = get("i") in TRUE_VALUES
+    if get("u") is not None:
+        properties["underline"] = get("u") != "none"
+    latin = rpr.find(A_LATIN)
+    if latin is not None and latin.get("typeface"):
+        typeface = latin.get("typeface")
+        if typeface.startswith("+"):
+            typeface = theme_fonts.get(typeface[1:3])
+        if typeface:
+            properties["font_name"] = typeface
+    return properties
+
+def read_ppr(ppr):
+    """Paragraph properties set explicitly on an <a:pPr> / <a:lvlNpPr> element."""
+    properties = {}
+    if ppr is None:
+        return properties
+    if ppr.get("algn") is not None:
+        properties["alignment"] = PP_ALIGN.from_xml(ppr.get("algn")).name.lower()
+    for child in ppr:
+        key = SPACING.get(child.tag)
+        if key is not None:
+            points = child.find(A_SPC_PTS)
+            properties[key] = int(points.get("val")) / 100 if points is not None else None
+    return properties
+
+def read_level(lst_style, level, theme_fonts, paragraph_properties, run_properties):
+    """Overlay lvl{level+1}pPr of a list style onto the two property dicts."""
+    if lst_style is None:
+        return
+    ppr = lst_style.find(_a(f"lvl{level + 1}pPr"))
+    if ppr is not None:
+        paragraph_properties.update(read_ppr(ppr))
+        run_properties.update(read_rpr(ppr.find(A_DEF_RPR), theme_fonts))
+
+def read_theme_fonts(master_part):
+    try:
+        theme_part = master_part.part_related_by(RT_THEME)
+    except KeyError:
+        return {}
+    theme = etree.fromstring(theme_part.blob, etree.XMLParser(resolve_entities=False))
+    fonts = {}
+    for key, kind in (("mj", "major"), ("mn", "minor")):
+        latin = theme.find(f".//{_a(kind + 'Font')}/{A_LATIN}")
+        if latin is not None and latin.get("typeface"):
+            fonts[key] = latin.get("typeface")
+    return fonts
+
+def shape_lst_style(sp):
+    tx_body = sp.find(_p("txBody"))
+    return tx_body.find(A_LST_STYLE) if tx_body is not None else None
+
+def placeholders(sp_tree_owner):
+    """[(type, idx, lstStyle)] of the placeholders on a layout or master."""
+    found = []
+    for sp in sp_tree_owner.iter(_p("sp")):
+        ph = sp.find(f"{_p('nvSpPr')}/{_p('nvPr')}/{_p('ph')}")
+        if ph is not None:
+            found.append((ph.get("type", "obj"), int(ph.get("idx", 0)), shape_lst_style(sp)))
+    return found
+
+class PptxStyleResolver:
+    def __init__(self, presentation):
+        self.default_text_style = presentation.part._element.find(_p("defaultTextStyle"))
+        self._masters = {}  # master partname -> (theme fonts, txStyles, {type: lstStyle})
+        self._layouts = {}  # layout partname -> (master partname, placeholders)
+        self._level_cache = {}
+
+    def _master(self, master):
+        partname = master.part.partname
+        if partname not in self._masters:
+            tx_styles = master._element.find(_p("txStyles"))
+            by_type = {}
+            for ph_type, _, lst_style in placeholders(master._element):
+                by_type.setdefault(MASTER_PLACEHOLDER_TYPES.get(ph_type, ph_type), lst_style)
+            self._masters[partname] = (read_theme_fonts(master.part), tx_styles, by_type)
+        return partname
+
+    def _layout(self, layout):
+        partname = layout.part.partname
+        if partname not in self._layouts:
+            self._layouts[partname] = (self._master(layout.slide_master), placeholders(layout._element))
+        return partname
+
+    def level_properties(self, layout_partname, ph_type, ph_idx, level):
+        """Inherited (paragraph, run) properties for a placeholder (ph_type None: not a placeholder)."""
+        key = (layout_partname, ph_type, ph_idx, level)
+        cached = self._level_cache.get(key)
+        if cached is not None:
+            return cached
+
+        master_partname, layout_placeholders = self._layouts[layout_partname]
+        theme_fonts, tx_styles, master_placeholders = self._masters[master_partname]
+        layout_lst_style = master_lst_style = None
+        master_type = None
+        if ph_type is not None:
+            match = (next((p for p in layout_placeholders if p[1] == ph_idx), None)
+                     or next((p for p in layout_placeholders if p[0] == ph_type), None))
+            if match is not None:
+                ph_type, _, layout_lst_style = match
+            master_type = MASTER_PLACEHOLDER_TYPES.get(ph_type, ph_type)
+            master_lst_style = master_placeholders.get(master_type)
+
+        paragraph_properties = dict(DEFAULT_PARAGRAPH)
+        run_properties = dict(DEFAULT_RUN)
+        read_level(self.default_text_style, level, theme_fonts, paragraph_properties, run_properties)
+        if tx_styles is not None:
+            read_level(tx_styles.find(_p(TX_STYLES.get(master_type, "otherStyle"))), level, theme_fonts,
+                       paragraph_properties, run_properties)
+        read_level(master_lst_style, level, theme_fonts, paragraph_properties, run_properties)
+        read_level(layout_lst_style, level, theme_fonts, paragraph_properties, run_properties)
+        cached = self._level_cache[key] = (paragraph_properties, run_properties, theme_fonts)
+        return cached
+
+    def paragraph_properties(self, shape, paragraph):
+        """(effective paragraph properties, inherited run properties) of a paragraph in a slide shape."""
+        sp = shape._element
+        ph = sp.ph if sp.tag == _p("sp") else None
+        layout_partname = self._layout(shape.part.slide_layout)
+        ppr = paragraph._p.pPr
+        level = int(ppr.get("lvl", 0)) if ppr is not None else 0
+        inherited_paragraph, inherited_run, theme_fonts = self.level_properties(
+            layout_partname, ph.get("type", "obj") if ph is not None else None,
+            int(ph.get("idx", 0)) if ph is not None else None, level)
+
+        paragraph_properties = dict(inherited_paragraph)
+        run_defaults = inherited_run
+        lst_style = shape_lst_style(sp)
+        if lst_style is not None and len(lst_style):
+            run_defaults = dict(inherited_run)
+            read_level(lst_style, level, theme_fonts, paragraph_properties, run_defaults)
+        paragraph_properties.update(read_ppr(ppr))
+        return paragraph_properties, (run_defaults, theme_fonts)
+
+    def run_properties(self, run_defaults, run):
+        """Effective properties of a run, given the run defaults from paragraph_properties()."""
+        inherited, theme_fonts = run_defaults
+        properties = dict(inherited)
+        properties.update(read_rpr(run._r.rPr, theme_fonts))
+        return properties
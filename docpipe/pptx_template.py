@@ -0,0 +1,60 @@
+"""Rebuild decks on a template that is parsed once per process.
+
+new_presentation(path) returns an independent copy of the template with its
+slides removed. The first call for a template parses the package; later calls
+deep-copy the already parsed parts (masters, layouts, theme), and media blobs
+are shared rather than copied. A worker in a batch or in the conversion
+service therefore pays for parsing a corporate master only once.
+"""
+import os
+import copy
+import threading
+
+_templates = {}  # (path, mtime, size) or None for the python-pptx default -> parsed, slide-less package
+_lock = threading.Lock()
+
+def strip_slides(presentation_part):
+    # Works on the XML directly: python-pptx proxies such as prs.slides cache references to
+    # sub-elements, and those would end up detached from the tree in a deep copy
+    sld_id_lst = presentation_part._element.sldIdLst
+    if sld_id_lst is not None:
+        for sld_id in list(sld_id_lst):
+            presentation_part.drop_rel(sld_id.rId)
+            sld_id_lst.remove(sld_id)
+
+def load_template(template_path=None):
+    """Return the cached, slide-less template package; clone it with new_presentation."""
+    if template_path is None:
+        key = None
+    else:
+        template_path = os.path.abspath(template_path)
+        stat = os.stat(template_path)
+        key = (template_path, stat.st_mtime, stat.st_size)
+
+    package = _templates.get(key)
+    if package is None:
+        with _lock:
+            package = _templates.get(key)
+            if package is None:
+                from pptx import Presentation
+                presentation_part = Presentation(template_path).part
+                strip_slides(presentation_part)
+                package = presentation_part.package
+                # A changed file replaces its stale entry instead of piling up next to it
+                for stale in [k for k in _templates if k and key and k[0] == key[0]]:
+                    del _templates[stale]
+                _templates[key] = package
+    return package
+
+def new_presentation(template_path=None):
+    """Return a new, independent Presentation built on the template."""
+    return copy.deepcopy(load_template(template_path)).main_document_part.presentation
+
+def find_layout(prs, name="Blank"):
+    """Pick a slide layout by name (case-insensitive), else the one with the fewest placeholders."""
+    layouts = list(prs.slide_layouts)
+    wanted = (name or "").strip().lower()
+    for layout in layouts:
+        if layout.name.strip().lower() == wanted:
+            return layout
+    return min(layouts, key=lambda layout: len(layout.placeholders))
@@ -0,0 +1,109 @@
+"""Progress events and cooperative cancellation for long conversions.
+
+Converters take two optional arguments:
+
+    on_event  callable receiving one dict per event
+    cancel    any object with is_set() (threading.Event, multiprocessing Event,
+              a Manager().Event() proxy); once it is set the converter raises
+              ConversionCancelled at its next check, i.e. before the next slide
+              or paragraph, or while waiting for a subprocess, which is killed
+
+    def on_event(event):
+        print(event["event"], event.get("slide"), event.get("total"))
+
+    cancel = threading.Event()
+    extract_combined_ppt_data("deck.pptx", "deck.pptx", on_event=on_event, cancel=cancel)
+
+Every event has "event" (its name) and "elapsed" (seconds since the converter
+started). Names and their extra fields:
+
+    started               converter, total (slides/paragraphs, when known)
+    slide_started         slide, index, total
+    slide_finished        slide, index, total, shapes
+    image_written         slide, filename, bytes
+    image_added           slide, filename
+    image_failed          slide, filename, error
+    paragraphs_finished   done, total
+    subprocess_started    command, pid
+    subprocess_finished   command, returncode
+    file_written          path
+    cancelled
+    finished
+
+With neither argument given, emit() and check() return after one attribute
+test, so the hooks can stay in place in production.
+"""
+import time
+import subprocess
+
+class ConversionCancelled(Exception):
+    pass
+
+class ThrottledCancel:
+    """Poll a cancel token whose is_set() is costly (a Manager proxy is one IPC round trip) at most every interval seconds."""
+
+    def __init__(self, token, interval=0.05):
+        self.token = token
+        self.interval = interval
+        self._next_poll = 0.0
+        self._set = False
+
+    def is_set(self):
+        if not self._set:
+            now = time.monotonic()
+            if now >= self._next_poll:
+                self._next_poll = now + self.interval
+                self._set = self.token.is_set()
+        return self._set
+
+class Reporter:
+    __slots__ = ("on_event", "cancel", "started")
+
+    def __init__(self, on_event=None, cancel=None):
+        self.on_event = on_event
+        self.cancel = cancel
+        self.started = time.perf_counter()
+
+    def emit(self, event, **fields):
+        if self.on_event is None:
+            return
+        record = {"event": event, "elapsed": round(time.perf_counter() - self.started, 6)}
+        record.update(fields)
+        self.on_event(record)
+
+    def check(self):
+        """Raise ConversionCancelled if the cancel token is set."""
+        if self.cancel is not None and self.cancel.is_set():
+            self.emit("cancelled")
+            raise ConversionCancelled("conversion cancelled")
+
+    def run(self, command, check=False, timeout=None, capture_output=False, poll_interval=0.2, **popen_kwargs):
+        """subprocess.run() that reports the process and kills it when the conversion is cancelled."""
+        self.check()
+        if capture_output:
+            popen_kwargs["stdout"] = popen_kwargs["stderr"] = subprocess.PIPE
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with subprocess.Popen(command, **popen_kwargs) as process:
+            self.emit("subprocess_started", command=command[0], pid=process.pid)
+            while True:
+                wait = poll_interval if self.cancel is not None else None
+                if deadline is not None:
+                    remaining = max(deadline - time.monotonic(), 0)
+                    wait = remaining if wait is None else min(wait, remaining)
+                try:
+                    stdout, stderr = process.communicate(timeout=wait)
+                    break
+                except subprocess.TimeoutExpired:
+                    if self.cancel is not None and self.cancel.is_set():
+                        process.kill()
+                        process.communicate()
+                        self.emit("subprocess_finished", command=command[0], returncode=process.returncode)
+                        self.check()
+                    if deadline is not None and time.monotonic() >= deadline:
+                        process.kill()
+                        process.communicate()
+                        raise subprocess.TimeoutExpired(command, timeout)
+        self.emit("subprocess_finished", command=command[0], returncode=process.returncode)
+        if check and process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+        return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
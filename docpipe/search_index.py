@@ -0,0 +1,309 @@
+"""On-disk full-text index over extracted decks and documents (SQLite, stdlib only).
+
+    python -m docpipe index search.db converted/          # add new / changed JSON files
+    python -m docpipe index search.db --remove old/output.json
+    python -m docpipe search search.db 'roadmap "market share"'
+
+Indexes the layout JSON written by extract_combined_ppt_data (anything with
+"slides") and the JSON written by extract_docx_to_json (anything with
+"paragraphs"). Text is split into lowercase word tokens; a hit is reported as
+(document, slide number, shape name, paragraph index). DOCX body paragraphs
+have no slide and the shape name "body"; table cells are "table T rRcC".
+
+Tables:
+    documents  one row per indexed JSON file, with its mtime and size so an
+               unchanged file is skipped on re-indexing
+    locations  (document, location id) -> slide, shape, paragraph
+    terms      vocabulary
+    postings   (term, document) -> packed positions: varint pairs of
+               (location id delta, token position or its delta within the
+               same location), so a term costs a few bytes per occurrence
+
+A query is a list of words and "quoted phrases", all of which must occur in
+a document; the documents are narrowed down in SQL before any postings are
+decoded.
+"""
+import os
+import re
+import json
+import sqlite3
+
+from docpipe.layout_model import PresentationData
+
+TOKEN_RE = re.compile(r"\w+")
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    kind TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS locations (
+    doc_id INTEGER NOT NULL,
+    loc_id INTEGER NOT NULL,
+    slide INTEGER,
+    shape TEXT,
+    paragraph INTEGER,
+    PRIMARY KEY (doc_id, loc_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    doc_id INTEGER NOT NULL,
+    positions BLOB NOT NULL,
+    PRIMARY KEY (term_id, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_by_doc ON postings (doc_id);
+"""
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.casefold())
+
+def pack_positions(pairs):
+    """Varint-encode sorted (location id, token position) pairs."""
+    out = bytearray()
+    last_loc = last_pos = 0
+    for loc, pos in pairs:
+        if loc != last_loc:
+            values = (loc - last_loc, pos)
+        else:
+            values = (0, pos - last_pos)
+        last_loc, last_pos = loc, pos
+        for value in values:
+            while value >= 0x80:
+                out.append(value & 0x7F | 0x80)
+                value >>= 7
+            out.append(value)
+    return bytes(out)
+
+def unpack_positions(data):
+    pairs = []
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(value)
+        value = shift = 0
+    loc = pos = 0
+    for i in range(0, len(values), 2):
+        if values[i]:
+            loc += values[i]
+            pos = values[i + 1]
+        else:
+            pos += values[i + 1]
+        pairs.append((loc, pos))
+    return pairs
+
+def iter_layout_locations(presentation):
+    """(slide, shape, paragraph, text) for a PresentationData from extract_combined_ppt_data."""
+    for slide in presentation.slides:
+        for shape in slide.shapes:
+            if shape.text is not None and shape.text.paragraphs:
+                for index, paragraph in enumerate(shape.text.paragraphs):
+                    yield slide.slide_number, shape.name, index, paragraph.text
+            elif shape.content:
+                yield slide.slide_number, shape.name, 0, shape.content
+
+def iter_docx_locations(data):
+    """(slide, shape, paragraph, text) for the JSON from extract_docx_to_json."""
+    def paragraph_text(paragraph):
+        if "runs" not in paragraph:  # text-only profile
+            return paragraph.get("text") or ""
+        return "".join(run.get("text") or "" for run in paragraph["runs"])
+
+    for index, paragraph in enumerate(data.get("paragraphs") or []):
+        yield None, "body", index, paragraph_text(paragraph)
+    for t, table in enumerate(data.get("tables") or [], 1):
+        for r, row in enumerate(table, 1):
+            for c, cell in enumerate(row, 1):
+                for index, paragraph in enumerate(cell):
+                    yield None, f"table {t} r{r}c{c}", index, paragraph_text(paragraph)
+
+def document_locations(data):
+    """Return (kind, locations) for a parsed JSON file, or (None, None) if it is neither format."""
+    if isinstance(data, dict) and "slides" in data:
+        return "pptx", iter_layout_locations(PresentationData.from_dict(data))
+    if isinstance(data, dict) and "paragraphs" in data:
+        return "docx", iter_docx_locations(data)
+    return None, None
+
+def iter_json_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+                for name in sorted(files):
+                    if name.lower().endswith(".json") and not name.startswith("."):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+class SearchIndex:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._term_ids = None  # loaded on the first add
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _term_id(self, term):
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = self.conn.execute("INSERT INTO terms (term) VALUES (?)", (term,)).lastrowid
+            self._term_ids[term] = term_id
+        return term_id
+
+    def add(self, path, force=False):
+        """Index one JSON file; returns False when it is unchanged or not an extracted document."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.conn.execute("SELECT id, mtime, size FROM documents WHERE path = ?", (path,)).fetchone()
+        if row and not force and row[1] == stat.st_mtime and row[2] == stat.st_size:
+            return False
+
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except ValueError:
+                return False
+        kind, locations = document_locations(data)
+        if kind is None:
+            return False
+        if self._term_ids is None:
+            self._term_ids = dict(self.conn.execute("SELECT term, id FROM terms"))
+
+        try:
+            self._insert(path, kind, stat, locations, row[0] if row else None)
+        except BaseException:
+            self._term_ids = None  # may hold ids from the rolled-back transaction
+            raise
+        return True
+
+    def _insert(self, path, kind, stat, locations, old_doc_id):
+        with self.conn:
+            if old_doc_id is not None:
+                self._delete(old_doc_id)
+            doc_id = self.conn.execute("INSERT INTO documents (path, kind, mtime, size) VALUES (?, ?, ?, ?)",
+                                       (path, kind, stat.st_mtime, stat.st_size)).lastrowid
+            location_rows = []
+            term_positions = {}
+            for loc_id, (slide, shape, paragraph, text) in enumerate(locations):
+                tokens = tokenize(text)
+                if not tokens:
+                    continue
+                location_rows.append((doc_id, loc_id, slide, shape, paragraph))
+                for position, token in enumerate(tokens):
+                    term_positions.setdefault(token, []).append((loc_id, position))
+            self.conn.executemany("INSERT INTO locations VALUES (?, ?, ?, ?, ?)", location_rows)
+            self.conn.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+                                  [(self._term_id(term), doc_id, pack_positions(pairs))
+                                   for term, pairs in term_positions.items()])
+
+    def _delete(self, doc_id):
+        self.conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM locations WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+    def remove(self, path):
+        with self.conn:
+            row = self.conn.execute("SELECT id FROM documents WHERE path = ?", (os.path.abspath(path),)).fetchone()
+            if row:
+                self._delete(row[0])
+        return row is not None
+
+    def prune(self):
+        """Drop documents whose JSON file no longer exists; returns how many."""
+        missing = [path for (path,) in self.conn.execute("SELECT path FROM documents") if not os.path.exists(path)]
+        for path in missing:
+            self.remove(path)
+        return len(missing)
+
+    def update(self, paths):
+        """Add new or changed JSON files under paths; returns (indexed, skipped)."""
+        indexed = skipped = 0
+        for path in iter_json_paths(paths):
+            if self.add(path):
+                indexed += 1
+            else:
+                skipped += 1
+        return indexed, skipped
+
+    def search(self, query, limit=100):
+        """Return hits [{"path", "slide", "shape", "paragraph"}] for words and "quoted phrases"."""
+        clauses = []
+        for phrase, word in QUERY_RE.findall(query):
+            tokens = tokenize(phrase or word)
+            if tokens:
+                clauses.append(tokens)
+        if not clauses:
+            return []
+
+        terms = sorted({token for tokens in clauses for token in tokens})
+        marks = ",".join("?" * len(terms))
+        term_ids = dict(self.conn.execute(f"SELECT term, id FROM terms WHERE term IN ({marks})", terms))
+        if len(term_ids) < len(terms):
+            return []  # a term that occurs nowhere
+
+        # Documents containing every term, before any positions are decoded
+        doc_ids = [doc_id for (doc_id,) in self.conn.execute(
+            f"SELECT doc_id FROM postings WHERE term_id IN ({marks}) GROUP BY doc_id HAVING COUNT(*) = ? "
+            f"ORDER BY doc_id", [*term_ids.values(), len(term_ids)])]
+
+        hits = []
+        for doc_id in doc_ids:
+            postings = dict(self.conn.execute(
+                f"SELECT term_id, positions FROM postings WHERE doc_id = ? AND term_id IN ({marks})",
+                [doc_id, *term_ids.values()]))
+            loc_ids = set()
+            for tokens in clauses:
+                clause_locations = self._match_clause(tokens, term_ids, postings)
+                if not clause_locations:
+                    break
+                loc_ids |= clause_locations
+            else:
+                (path,) = self.conn.execute("SELECT path FROM documents WHERE id = ?", (doc_id,)).fetchone()
+                rows = self.conn.execute(
+                    f"SELECT slide, shape, paragraph FROM locations WHERE doc_id = ? AND loc_id IN "
+                    f"({','.join('?' * len(loc_ids))}) ORDER BY loc_id", [doc_id, *sorted(loc_ids)])
+                for slide, shape, paragraph in rows:
+                    hits.append({"path": path, "slide": slide, "shape": shape, "paragraph": paragraph})
+                    if len(hits) >= limit:
+                        return hits
+        return hits
+
+    def _match_clause(self, tokens, term_ids, postings):
+        """Location ids of one document where tokens occur consecutively."""
+        first = unpack_positions(postings[term_ids[tokens[0]]])
+        if len(tokens) == 1:
+            return {loc for loc, _ in first}
+        starts = set(first)
+        for offset, token in enumerate(tokens[1:], 1):
+            following = {(loc, pos - offset) for loc, pos in unpack_positions(postings[term_ids[token]])}
+            starts &= following
+            if not starts:
+                return set()
+        return {loc for loc, _ in starts}
+
+    def stats(self):
+        count = lambda table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return {"documents": count("documents"), "terms": count("terms"), "postings": count("postings"),
+                "bytes": os.path.getsize(self.db_path)}
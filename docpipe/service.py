@@ -0,0 +1,260 @@
+"""Local HTTP service that runs the converters as queued jobs on warm worker processes.
+
+    python -m docpipe.service --port 8765 --workers 4
+
+    POST   /jobs                          {"kind": "docx_latex", "params": {"docx": "/abs/in.docx"}}
+    GET    /jobs/<id>                     job status, with the latest progress event
+    POST   /jobs/<id>/cancel              stop a queued or running job
+    GET    /jobs/<id>/result              artifact list once the job has finished
+    GET    /jobs/<id>/artifacts/<name>    download one artifact
+    DELETE /jobs/<id>                     drop the job and its artifacts
+
+Params are paths on the local filesystem. When the queue is full POST /jobs
+answers 503 with a Retry-After header instead of accepting more work.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import shutil
+import argparse
+import tempfile
+import functools
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from docpipe import converters
+from docpipe.progress import ConversionCancelled, ThrottledCancel
+
+def _noop():
+    return os.getpid()
+
+def _forward_event(events, job_id, event):
+    events.put((job_id, event))
+
+class ConversionService:
+    def __init__(self, workers=2, max_queue=16, artifact_dir=None, artifact_ttl=3600):
+        self.workers = workers
+        self.artifact_dir = artifact_dir or tempfile.mkdtemp(prefix="docpipe_jobs_")
+        self.artifact_ttl = artifact_ttl
+        self.jobs = {}
+        self._lock = threading.Lock()
+        # Counts queued + running jobs; POST /jobs is refused once it is exhausted
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._pool = self._start_pool()
+        # Cancel tokens and progress events have to cross into the worker processes
+        self._manager = multiprocessing.Manager()
+        self._events = self._manager.Queue()
+        self._stop = threading.Event()
+        self._janitor = threading.Thread(target=self._cleanup_loop, daemon=True)
+        self._janitor.start()
+        self._event_reader = threading.Thread(target=self._read_events, daemon=True)
+        self._event_reader.start()
+
+    def _start_pool(self):
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=converters.warm_up)
+        # Workers are spawned on demand; start them all now so the first jobs are warm
+        for future in [pool.submit(_noop) for _ in range(self.workers)]:
+            future.result()
+        return pool
+
+    def submit(self, kind, params):
+        converters.validate_job(kind, params)
+        if not self._slots.acquire(blocking=False):
+            return None
+
+        try:
+            job_id = uuid.uuid4().hex
+            workdir = os.path.join(self.artifact_dir, job_id)
+            job = {"id": job_id, "kind": kind, "params": params, "workdir": workdir,
+                   "created": time.time(), "finished": None, "error": None, "artifacts": None,
+                   "cancel": self._manager.Event(), "cancelled": False, "progress": None}
+            run = functools.partial(converters.run_job, kind, params, workdir,
+                                    on_event=functools.partial(_forward_event, self._events, job_id),
+                                    cancel=ThrottledCancel(job["cancel"]))
+            try:
+                future = self._pool.submit(run)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM); replace the pool and retry once
+                self._pool = self._start_pool()
+                future = self._pool.submit(run)
+        except BaseException:
+            self._slots.release()  # _finish never runs for a job that was not submitted
+            raise
+        job["future"] = future
+        with self._lock:
+            self.jobs[job_id] = job
+        future.add_done_callback(lambda f, job=job: self._finish(job, f))
+        return job
+
+    def _finish(self, job, future):
+        try:
+            job["artifacts"] = future.result()
+        except (ConversionCancelled, CancelledError):
+            job["cancelled"] = True
+        except Exception as e:
+            job["error"] = f"{type(e).__name__}: {e}"
+        job["finished"] = time.time()
+        self._slots.release()
+
+    def _read_events(self):
+        while not self._stop.is_set():
+            try:
+                job_id, event = self._events.get(timeout=1)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):  # manager shut down
+                return
+            job = self.get(job_id)
+            if job is not None:
+                job["progress"] = event
+
+    def cancel(self, job):
+        """Stop a job: a queued one never starts, a running one stops at its next check."""
+        job["cancel"].set()
+        job["future"].cancel()
+
+    def status(self, job):
+        future = job["future"]
+        if not future.done():
+            state = "running" if future.running() else "queued"
+        elif job["cancelled"]:
+            state = "cancelled"
+        else:
+            state = "failed" if job["error"] else "done"
+        return {"id": job["id"], "kind": job["kind"], "status": state, "error": job["error"],
+                "created": job["created"], "finished": job["finished"], "progress": job["progress"]}
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def delete(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or not job["future"].done():
+                return False
+            del self.jobs[job_id]
+        shutil.rmtree(job["workdir"], ignore_errors=True)
+        return True
+
+    def _cleanup_loop(self):
+        while not self._stop.wait(min(60, self.artifact_ttl)):
+            cutoff = time.time() - self.artifact_ttl
+            with self._lock:
+                expired = [job_id for job_id, job in self.jobs.items()
+                           if job["finished"] is not None and job["finished"] < cutoff]
+            for job_id in expired:
+                self.delete(job_id)
+
+    def shutdown(self):
+        self._stop.set()
+        self._pool.shutdown(cancel_futures=True)
+        self._manager.shutdown()
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, code, payload, headers=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _route(self):
+            parts = [p for p in self.path.split("?")[0].split("/") if p]
+            if len(parts) < 2 or parts[0] != "jobs":
+                return None, parts
+            return service.get(parts[1]), parts
+
+        def do_GET(self):
+            if self.path == "/health":
+                return self._send_json(200, {"status": "ok", "jobs": len(service.jobs)})
+            job, parts = self._route()
+            if job is None:
+                return self._send_json(404, {"error": "no such job"})
+            if len(parts) == 2:
+                return self._send_json(200, service.status(job))
+            if not job["future"].done():
+                return self._send_json(409, service.status(job))
+            if parts[2] == "result" and len(parts) == 3:
+                if job["error"] or job["cancelled"]:
+                    return self._send_json(500, service.status(job))
+                links = {name: f"/jobs/{job['id']}/artifacts/{name}" for name in job["artifacts"]}
+                return self._send_json(200, dict(service.status(job), artifacts=links))
+            if parts[2] == "artifacts" and len(parts) == 4 and parts[3] in (job["artifacts"] or {}):
+                path = job["artifacts"][parts[3]]
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(os.path.getsize(path)))
+                self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(path)}"')
+                self.end_headers()
+                with open(path, "rb") as f:
+                    shutil.copyfileobj(f, self.wfile)
+                return
+            return self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            job, parts = self._route()
+            if len(parts) == 3 and parts[2] == "cancel":
+                if job is None:
+                    return self._send_json(404, {"error": "no such job"})
+                service.cancel(job)
+                return self._send_json(202, service.status(job))
+            if self.path.rstrip("/") != "/jobs":
+                return self._send_json(404, {"error": "not found"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(request, dict):
+                    raise ValueError("request body must be a JSON object")
+                job = service.submit(request.get("kind"), request.get("params") or {})
+            except ValueError as e:
+                return self._send_json(400, {"error": str(e)})
+            if job is None:
+                return self._send_json(503, {"error": "job queue is full"}, {"Retry-After": "5"})
+            return self._send_json(202, service.status(job), {"Location": f"/jobs/{job['id']}"})
+
+        def do_DELETE(self):
+            job, parts = self._route()
+            if job is None or len(parts) != 2:
+                return self._send_json(404, {"error": "no such job"})
+            if not service.delete(job["id"]):
+                return self._send_json(409, {"error": "job is still running"})
+            return self._send_json(200, {"id": job["id"], "deleted": True})
+
+        def log_message(self, format, *args):
+            sys.stderr.write("%s - %s\n" % (self.address_string(), format % args))
+
+    return Handler
+
+def serve(host="127.0.0.1", port=8765, workers=2, max_queue=16, artifact_dir=None, artifact_ttl=3600):
+    service = ConversionService(workers, max_queue, artifact_dir, artifact_ttl)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"✅ Conversion service listening on http://{host}:{port} ({workers} warm workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the converters as a local job service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-queue", type=int, default=16, help="queued + running jobs before 503")
+    parser.add_argument("--artifact-dir", default=None)
+    parser.add_argument("--artifact-ttl", type=int, default=3600, help="seconds to keep finished jobs")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.max_queue, args.artifact_dir, args.artifact_ttl)
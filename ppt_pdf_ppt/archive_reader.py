@@ -0,0 +1,108 @@
+import io
+import mmap
+import struct
+import zipfile
+
+LOCAL_HEADER = struct.Struct("<4s22xHH")  # signature, ..., file name length, extra field length
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+class MemoryViewStream(io.RawIOBase):
+    """Read-only, seekable file object over a memoryview, without copying it up front."""
+
+    def __init__(self, view):
+        self._view = view
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(len(self._view), self._pos + size)
+        data = bytes(self._view[self._pos:end])
+        self._pos = max(self._pos, end)
+        return data
+
+    def readinto(self, buffer):
+        data = self._view[self._pos:self._pos + len(buffer)]
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def getbuffer(self):
+        return self._view
+
+def as_stream(data):
+    return MemoryViewStream(data) if isinstance(data, memoryview) else io.BytesIO(data)
+
+class MappedZip:
+    """Zip reader backed by a memory map of the whole archive.
+
+    Members stored without compression (ZIP_STORED, which is how pp1111.py
+    writes extracted_images.zip) are handed out as memoryview slices of the
+    map, so no copy is made until a consumer reads the bytes. Deflated and
+    encrypted members fall back to zipfile's streaming decompression.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            self._zip = zipfile.ZipFile(self._file)
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()  # not a zip (or empty): don't leak the handle
+            raise
+        self._view = memoryview(self._map)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def namelist(self):
+        return self._zip.namelist()
+
+    def view(self, name):
+        """Return a zero-copy memoryview of a stored member, or None if it is compressed."""
+        info = self._zip.getinfo(name)
+        if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+            return None
+        signature, name_len, extra_len = LOCAL_HEADER.unpack_from(self._map, info.header_offset)
+        if signature != LOCAL_HEADER_SIGNATURE:
+            raise zipfile.BadZipFile(f"bad local header for {name}")
+        start = info.header_offset + LOCAL_HEADER.size + name_len + extra_len
+        return self._view[start:start + info.file_size]
+
+    def read(self, name):
+        """Return a memoryview for stored members, bytes otherwise."""
+        view = self.view(name)
+        return view if view is not None else self._zip.read(name)
+
+    def open(self, name):
+        """Return a readable file object for a member."""
+        view = self.view(name)
+        return MemoryViewStream(view) if view is not None else self._zip.open(name)
+
+    def close(self):
+        self._zip.close()
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # A caller still holds a slice; the map is released when that slice is
+            pass
+        self._file.close()
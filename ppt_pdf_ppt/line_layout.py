@@ -0,0 +1,302 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+from slide_range import parse_slide_range
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from docpipe.layout_model import load_presentation, save_presentation
+
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+DEFAULT_FONT_DIRS = [
+    "/usr/share/fonts", "/usr/local/share/fonts", "~/.fonts", "~/.local/share/fonts",
+    "/Library/Fonts", "/System/Library/Fonts", "~/Library/Fonts",
+    os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+]
+
+# Metric-compatible stand-ins for the Office fonts, then generic fallbacks
+FONT_SUBSTITUTES = {
+    "calibri": ["Carlito"],
+    "cambria": ["Caladea"],
+    "arial": ["Liberation Sans", "Arimo"],
+    "helvetica": ["Liberation Sans", "Arimo"],
+    "times new roman": ["Liberation Serif", "Tinos"],
+    "courier new": ["Liberation Mono", "Cousine"],
+}
+FALLBACK_FAMILIES = ["Liberation Sans", "Arimo", "DejaVu Sans", "Noto Sans"]
+
+BREAK_CHARS = re.compile(r"[\n\v]")
+TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+def _style_flags(font):
+    if "OS/2" in font:
+        selection = font["OS/2"].fsSelection
+        return bool(selection & 0x20), bool(selection & 0x01)
+    mac_style = font["head"].macStyle
+    return bool(mac_style & 0x01), bool(mac_style & 0x02)
+
+class FontMetrics:
+    """Glyph advances for locally installed fonts, cached on disk.
+
+    The font index (family/bold/italic per file) and each font's advance table
+    (code point -> advance in font units) are stored as JSON under cache_dir and
+    are rebuilt only when a font file's size or mtime changes. Kerning and
+    ligatures are not applied.
+    """
+
+    def __init__(self, cache_dir=".font_cache", font_dirs=None):
+        self.cache_dir = cache_dir
+        self.font_dirs = font_dirs or [d for d in os.environ.get("DOCPIPE_FONT_DIRS", "").split(os.pathsep) if d] \
+            or DEFAULT_FONT_DIRS
+        self._index = None
+        self._advances = {}
+        self._resolved = {}
+
+    def _font_files(self):
+        for directory in self.font_dirs:
+            for root, _dirs, files in os.walk(os.path.expanduser(directory)):
+                for name in files:
+                    if name.lower().endswith(FONT_EXTENSIONS):
+                        yield os.path.join(root, name)
+
+    def _load_index(self):
+        from fontTools.ttLib import TTFont, TTCollection
+
+        index_path = os.path.join(self.cache_dir, "font_index.json")
+        cached = {}
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                for entry in json.load(f):
+                    cached.setdefault((entry["path"], entry["mtime"], entry["size"]), []).append(entry)
+
+        entries, changed = [], False
+        for path in self._font_files():
+            stat = os.stat(path)
+            key = (path, stat.st_mtime, stat.st_size)
+            if key in cached:
+                entries.extend(cached.pop(key))
+                continue
+            changed = True
+            try:
+                if path.lower().endswith(".ttc"):
+                    fonts = TTCollection(path, lazy=True).fonts
+                else:
+                    fonts = [TTFont(path, lazy=True)]
+            except Exception as e:
+                print(f"⚠️ Skipping unreadable font {path}: {e}")
+                continue
+            for number, font in enumerate(fonts):
+                name_table = font["name"]
+                family = name_table.getDebugName(16) or name_table.getDebugName(1)
+                if not family:
+                    continue
+                bold, italic = _style_flags(font)
+                entries.append({"path": path, "mtime": stat.st_mtime, "size": stat.st_size, "number": number,
+                                "family": family, "bold": bold, "italic": italic})
+
+        if changed or cached:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, index_path)
+
+        self._index = {}
+        for entry in entries:
+            self._index.setdefault(entry["family"].lower(), []).append(entry)
+
+    def resolve(self, family, bold=False, italic=False):
+        """Return (font entry, exact) for a family, falling back to substitutes; None if no fonts at all."""
+        key = ((family or "").lower(), bool(bold), bool(italic))
+        if key in self._resolved:
+            return self._resolved[key]
+        if self._index is None:
+            self._load_index()
+
+        candidates = [key[0]] + [name.lower() for name in FONT_SUBSTITUTES.get(key[0], [])] \
+            + [name.lower() for name in FALLBACK_FAMILIES]
+        result = None
+        for rank, name in enumerate(candidates):
+            faces = self._index.get(name)
+            if faces:
+                # Prefer the matching face, then the regular one
+                face = min(faces, key=lambda e: (e["bold"] != key[1]) + (e["italic"] != key[2]))
+                result = (face, rank == 0 and face["bold"] == key[1] and face["italic"] == key[2])
+                break
+        if result is None and self._index:
+            result = (next(iter(self._index.values()))[0], False)
+        self._resolved[key] = result
+        return result
+
+    def advances(self, entry):
+        """Return (units_per_em, default advance, {code point: advance}) for a font entry."""
+        ident = f"{entry['path']}#{entry['number']}:{entry['mtime']}:{entry['size']}"
+        if ident in self._advances:
+            return self._advances[ident]
+
+        cache_path = os.path.join(self.cache_dir, "advances",
+                                  hashlib.sha1(ident.encode("utf-8")).hexdigest()[:16] + ".json")
+        if os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            table = (data["units_per_em"], data["default"], {int(cp): adv for cp, adv in data["advances"].items()})
+        else:
+            from fontTools.ttLib import TTFont
+            font = TTFont(entry["path"], fontNumber=entry["number"], lazy=True)
+            metrics = font["hmtx"].metrics
+            advances = {cp: metrics[glyph][0] for cp, glyph in (font.getBestCmap() or {}).items()
+                         if glyph in metrics}
+            default = metrics.get(".notdef", (font["head"].unitsPerEm // 2, 0))[0]
+            table = (font["head"].unitsPerEm, default, advances)
+
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"units_per_em": table[0], "default": default, "advances": advances}, f)
+            os.replace(tmp_path, cache_path)
+
+        self._advances[ident] = table
+        return table
+
+    def char_widths(self, text, family, size_pt, bold=False, italic=False):
+        """Return ([width in points per character], exact font match)."""
+        resolved = self.resolve(family, bold, italic)
+        if resolved is None:
+            raise FileNotFoundError("no font files found; set DOCPIPE_FONT_DIRS")
+        entry, exact = resolved
+        units_per_em, default, advances = self.advances(entry)
+        scale = size_pt / units_per_em
+        return [advances.get(ord(ch), default) * scale for ch in text], exact
+
+def wrap_text(text, widths, max_width):
+    # Greedy wrapping at whitespace; a word wider than the line is split between characters
+    cumulative = [0.0]
+    for width in widths:
+        cumulative.append(cumulative[-1] + width)
+
+    lines = []
+    line_start = line_end = 0
+    line_width = 0.0
+    for match in TOKEN_RE.finditer(text):
+        start, end = match.span()
+        core_end = start + len(match.group().rstrip())
+        core_width = cumulative[core_end] - cumulative[start]
+
+        if line_end > line_start and line_width + core_width > max_width:
+            lines.append(text[line_start:line_end])
+            line_start, line_width = start, 0.0
+        while core_width > max_width and core_end - start > 1:
+            # Split an over-long word at the last character that still fits
+            cut = start + 1
+            while cut < core_end and cumulative[cut + 1] - cumulative[start] <= max_width:
+                cut += 1
+            lines.append(text[line_start:cut])
+            line_start = start = cut
+            core_width = cumulative[core_end] - cumulative[start]
+        line_end = end
+        line_width += cumulative[end] - cumulative[start]
+    if line_end > line_start:
+        lines.append(text[line_start:line_end])
+    return lines
+
+def layout_shape_lines(shape, metrics, default_font="Calibri", default_size_pt=18.0):
+    """Compute the wrapped lines of a text ShapeData.
+
+    Returns (lines, exact) where exact is False if any run had to use a
+    substitute font. Stripped, non-empty lines, in the same form as the
+    rendered_lines that pp2.py reads from the PDF. Bullets, indents and
+    autofit shrinking are not modelled.
+    """
+    frame = shape.text
+    if frame is None:
+        return [], True
+    max_width = shape.width_pt - (frame.margin_left_pt or 0) - (frame.margin_right_pt or 0)
+    lines, exact = [], True
+    for paragraph in frame.paragraphs:
+        text, widths = "", []
+        for run in paragraph.runs:
+            run_text = run.text
+            run_widths, run_exact = metrics.char_widths(
+                run_text, run.font_name or default_font, run.font_size_pt or default_size_pt,
+                run.bold, run.italic)
+            text += run_text
+            widths.extend(run_widths)
+            exact = exact and run_exact
+
+        offset = 0
+        for segment in BREAK_CHARS.split(text):
+            segment_widths = widths[offset:offset + len(segment)]
+            offset += len(segment) + 1
+            for line in (wrap_text(segment, segment_widths, max_width) if max_width > 0 else [segment]):
+                if line.strip():
+                    lines.append(line.strip())
+    return lines, exact
+
+def attach_computed_lines(json_path, output_json="output_with_layout.json", slides=None, pdf_path=None,
+                          cache_dir=".font_cache", font_dirs=None, default_font="Calibri", default_size_pt=18.0):
+    """Fill rendered_lines from font metrics instead of a LibreOffice PDF render.
+
+    With pdf_path the rendered PDF acts as validator and fallback: shapes laid
+    out with a substitute font take the PDF lines without comparison, shapes
+    laid out with the real fonts are checked against the PDF and take its
+    lines when they differ, and the agreement rate is printed.
+    """
+    presentation = load_presentation(json_path)
+
+    metrics = FontMetrics(cache_dir, font_dirs)
+    last_slide = max((slide.slide_number for slide in presentation.slides), default=0)
+    selected = parse_slide_range(slides, last_slide)
+    selected = set(selected) if selected is not None else None
+
+    pdf_lines = None
+    if pdf_path:
+        from pp2 import rendered_lines_by_shape
+        pdf_lines = rendered_lines_by_shape(presentation, pdf_path, slides)
+
+    computed = checked = matched = mismatched = substitute = from_pdf = 0
+    for slide in presentation.slides:
+        if selected is not None and slide.slide_number not in selected:
+            continue
+        for shape_index, shape in enumerate(slide.shapes):
+            if shape.type != "text":
+                continue
+            lines, exact = layout_shape_lines(shape, metrics, default_font, default_size_pt)
+            computed += 1
+            if not exact:
+                substitute += 1
+            reference = pdf_lines.get((slide.slide_number, shape_index)) if pdf_lines is not None else None
+            if reference is not None:
+                if not exact:
+                    lines = reference  # substitute metrics are not worth validating
+                    from_pdf += 1
+                else:
+                    checked += 1
+                    if reference == lines:
+                        matched += 1
+                    else:
+                        mismatched += 1
+                        lines = reference
+                        from_pdf += 1
+            if lines:
+                shape.rendered_lines = lines
+
+    save_presentation(presentation, output_json)
+
+    if pdf_lines is not None:
+        print(f"✅ Computed lines matched the PDF for {matched}/{checked} text shapes laid out with their own "
+              f"fonts ({mismatched} mismatches); {from_pdf} of {computed} shapes took the PDF lines")
+    if substitute:
+        print(f"⚠️ {substitute} text shapes were laid out with a substitute font")
+    print(f"\n✅ Enhanced JSON with computed layout saved to: {output_json}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute rendered_lines from font metrics.")
+    parser.add_argument("json")
+    parser.add_argument("-o", "--output", default="output_with_layout.json")
+    parser.add_argument("--slides")
+    parser.add_argument("--pdf", help="rendered PDF to validate against and fall back to")
+    parser.add_argument("--font-dir", action="append", dest="font_dirs")
+    args = parser.parse_args()
+    attach_computed_lines(args.json, args.output, args.slides, args.pdf, font_dirs=args.font_dirs)
@@ -1,6 +1,12 @@
+import os
+import sys
 from pptx import Presentation
 
-def convert_to_blank_layout(input_path, output_path):
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from docpipe.opc_writer import save_pptx
+
+def convert_to_blank_layout(input_path, output_path, xml_level=6, media_level=0):
+    # xml_level / media_level: deflate levels for XML parts and for media (0 stores)
     prs = Presentation(input_path)
     blank_layout = prs.slide_layouts[6]
 
@@ -22,8 +28,9 @@ def convert_to_blank_layout(input_path, output_path):
             except Exception as e:
                 print(f"⚠️ Could not copy shape: {shape.name} — {e}")
 
-    new_prs.save(output_path)
+    save_pptx(new_prs, output_path, xml_level, media_level)
     print(f"✅ Slides converted to blank layout and saved to: {output_path}")
 
 # Usage:
-convert_to_blank_layout("input.pptx", "input_blank.pptx")
+if __name__ == "__main__":
+    convert_to_blank_layout("input.pptx", "input_blank.pptx")
@@ -1,18 +1,23 @@
 import os
 import json
 import uuid
-import base64
 import zipfile
+import sys
 from pptx import Presentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from docpipe.image_utils import ThumbnailJobs
+
 def emu_to_points(emu):
     return emu / 12700.0
 
-def extract_images_from_pptx(pptx_path, image_output_dir):
+def extract_images_from_pptx(pptx_path, image_output_dir, thumbnail_max_edge=120, thumbnail_format="webp",
+                             thumbnail_cache_dir=".thumbnail_cache"):
     prs = Presentation(pptx_path)
     os.makedirs(image_output_dir, exist_ok=True)
     images = []
+    thumbnails = ThumbnailJobs(thumbnail_max_edge, thumbnail_format, thumbnail_cache_dir)
     for slide_index, slide in enumerate(prs.slides):
         for shape in slide.shapes:
             if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
@@ -31,21 +36,23 @@ def extract_images_from_pptx(pptx_path, image_output_dir):
                 image_path = os.path.join(image_output_dir, image_filename)
                 with open(image_path, 'wb') as f:
                     f.write(image_blob)
-                with open(image_path, 'rb') as img_file:
-                    encoded_string = base64.b64encode(img_file.read()).decode('utf-8')
+                image_metadata = {
+                    "content_type": image.content_type,
+                    "ext": image_ext,
+                    "filename": image_filename,
+                    "saved_path": os.path.abspath(image_path),
+                    "thumbnail_base64": None,
+                    "thumbnail_content_type": None
+                }
+                thumbnails.submit(image_metadata, image_blob)
                 images.append({
                     "slide_index": slide_index,
                     "name": shape.name,
                     "position": shape_position,
                     "size": shape_size,
-                    "image_metadata": {
-                        "content_type": image.content_type,
-                        "ext": image_ext,
-                        "filename": image_filename,
-                        "saved_path": os.path.abspath(image_path),
-                        "thumbnail_base64": encoded_string
-                    }
+                    "image_metadata": image_metadata
                 })
+    thumbnails.close()
     return images
 
 def combine_blank_with_images(blank_json_path, pptx_path, output_json="output_data.json", image_output_dir="extracted_images"):
@@ -1,118 +1,228 @@
 import os
+import sys
 import json
 import uuid
-import base64
 import zipfile
-import subprocess
-from pptx import Presentation
+import tempfile
+import itertools
+import textwrap
 from pptx.enum.shapes import MSO_SHAPE_TYPE
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from docpipe.image_utils import ThumbnailJobs
+from docpipe.layout_model import (PresentationData, SlideData, ShapeData, TextFrameData, ParagraphData,
+                                  RunData, ImageData, save_presentation)
+from docpipe.progress import Reporter, ConversionCancelled
+from docpipe.pptx_styles import PptxStyleResolver
+from slide_range import open_presentation_subset
+
 def emu_to_points(emu):
     return emu / 12700.0
 
-def convert_pptx_to_pdf(pptx_path, output_pdf_path=None):
+def convert_pptx_to_pdf(pptx_path, output_pdf_path=None, on_event=None, cancel=None):
+    # on_event / cancel: see docpipe.progress; cancelling kills LibreOffice
     if output_pdf_path is None:
         output_pdf_path = os.path.splitext(pptx_path)[0] + ".pdf"
+    reporter = Reporter(on_event, cancel)
     try:
-        subprocess.run([
+        reporter.run([
             "libreoffice", "--headless", "--convert-to", "pdf", pptx_path,
             "--outdir", os.path.dirname(output_pdf_path) or "."
         ], check=True)
         print(f"✅ PDF generated at: {output_pdf_path}")
+        reporter.emit("file_written", path=output_pdf_path)
+    except ConversionCancelled:
+        raise
     except Exception as e:
         print(f"❌ PDF conversion failed: {e}")
 
-def extract_combined_ppt_data(text_pptx_path, image_pptx_path, output_json_path="output_data.json", image_output_dir="extracted_images"):
-    text_prs = Presentation(text_pptx_path)
-    image_prs = Presentation(image_pptx_path)
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and KiB on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def write_presentation_json(f, slide_width, slide_height, slides):
+    """Write the same text as json.dump(..., indent=4), pulling slides from an iterable."""
+    f.write("{\n")
+    f.write(f'    "slide_width_emu": {json.dumps(slide_width)},\n')
+    f.write(f'    "slide_height_emu": {json.dumps(slide_height)},\n')
+    f.write('    "slides": [')
+    count = 0
+    for slide in slides:
+        f.write(",\n" if count else "\n")
+        f.write(textwrap.indent(json.dumps(slide, indent=4, ensure_ascii=False), " " * 8))
+        count += 1
+    f.write("\n    ]\n}" if count else "]\n}")
+
+def iter_spilled_slides(spill_file):
+    spill_file.seek(0)
+    for line in spill_file:
+        yield json.loads(line)
+
+def extract_text_layout(pptx_path, output_json_path="output_data.json", slides=None, on_event=None, cancel=None):
+    """Text-only profile: shapes, positions and paragraph text, nothing else.
+
+    Media parts are never read from the package, and run styling, alignment,
+    spacing and margins are not looked up: each paragraph has one unstyled
+    run holding its text and margins are null. No images are written, and the
+    JSON is written compactly rather than indented.
+    """
+    reporter = Reporter(on_event, cancel)
+    prs, slide_numbers = open_presentation_subset(pptx_path, slides or "1-", include_media=False)
+    total = len(slide_numbers)
+    reporter.emit("started", converter="extract_text_layout", total=total)
+
+    slides_json = []
+    for index, (slide_number, slide) in enumerate(zip(slide_numbers, prs.slides)):
+        reporter.check()
+        reporter.emit("slide_started", slide=slide_number, index=index, total=total)
+        slide_data = SlideData(slide_number)
+        for shape in slide.shapes:
+            shape_data = ShapeData(None, shape.name, emu_to_points(shape.left), emu_to_points(shape.top),
+                                   emu_to_points(shape.width), emu_to_points(shape.height))
+            if shape.has_text_frame:
+                paragraphs = [ParagraphData(None, [RunData("".join(r.text for r in p.r_lst))])
+                              for p in shape.text_frame._txBody.p_lst]
+                shape_data.type = "text"
+                shape_data.content = "".join(p.runs[0].text for p in paragraphs).strip()
+                shape_data.text = TextFrameData(paragraphs, None, None, None, None, None)
+            slide_data.shapes.append(shape_data)
+        slides_json.append(slide_data)
+        if budget_bytes:
+            held_bytes += len(json.dumps(slide_data.to_dict(), ensure_ascii=False).encode('utf-8'))
+        reporter.emit("slide_finished", slide=slide_number, index=index, total=total, shapes=len(slide_data.shapes))
+
+    save_presentation(PresentationData(prs.slide_width, prs.slide_height, slides_json), output_json_path, indent=None)
+    print(f"\n✅ JSON saved to: {output_json_path}")
+    reporter.emit("file_written", path=output_json_path)
+    reporter.emit("finished")
+
+def extract_combined_ppt_data(text_pptx_path, image_pptx_path, output_json_path="output_data.json", image_output_dir="extracted_images",
+                              memory_budget_mb=None, thumbnail_max_edge=120, thumbnail_format="webp",
+                              thumbnail_cache_dir=".thumbnail_cache", thumbnail_workers=None, slides=None,
+                              on_event=None, cancel=None, text_only=False):
+    """Extract text layout and images into output_json_path.
+
+    slides selects a subset such as "40-55" or [1, 3, 5]; other slides are not
+    loaded from either package and are left out of the output.
+
+    thumbnail_base64 holds a preview no larger than thumbnail_max_edge pixels,
+    rendered in a thread pool and cached by image hash; the full-size images are
+    only in the zip. Pass thumbnail_max_edge=None to embed the original instead.
+
+    With memory_budget_mb set, finished slide records are spilled to a temp file
+    and image blobs are released from the loaded package (and re-read from their
+    extracted copy if needed again) whenever the tracked data exceeds the budget.
+    Tracked data is the image blobs still resident plus the serialized size of
+    the finished slide records; the parsed slide XML itself is not counted.
+
+    on_event / cancel report progress and stop the run between slides (see
+    docpipe.progress); a cancelled run writes neither the JSON nor the zip.
+
+    text_only=True runs extract_text_layout on text_pptx_path instead: no
+    images, no zip, no run styling or margins.
+    """
+    if text_only:
+        return extract_text_layout(text_pptx_path, output_json_path, slides, on_event, cancel)
+    reporter = Reporter(on_event, cancel)
+    # Only text frames are read from the text deck, so skip its media entirely; otherwise
+    # every image would be held twice when both decks are the same file
+    text_prs, slide_numbers = open_presentation_subset(text_pptx_path, slides or "1-", include_media=False)
+    image_prs, _ = open_presentation_subset(image_pptx_path, slides or "1-")
 
     os.makedirs(image_output_dir, exist_ok=True)
 
+    styles = PptxStyleResolver(text_prs)  # inherited sizes, fonts and spacing, cached per layout placeholder
     slides_json = []
     slide_width = text_prs.slide_width
     slide_height = text_prs.slide_height
 
-    for slide_number, (text_slide, image_slide) in enumerate(zip(text_prs.slides, image_prs.slides)):
-        slide_data = {
-            "slide_number": slide_number + 1,
-            "shapes": []
-        }
+    budget_bytes = memory_budget_mb * 1024 * 1024 if memory_budget_mb else None
+    held_bytes = 0
+    held_image_parts = {}  # partname -> (part, saved path, content type, ext) still resident
+    spilled_images = {}    # partname -> (saved path, content type, ext) after the blob was released
+    spill_file = None
+
+    # Thumbnails are filled in before records are written
+    thumbnails = ThumbnailJobs(thumbnail_max_edge, thumbnail_format, thumbnail_cache_dir, thumbnail_workers)
+    total = len(slide_numbers)
+    reporter.emit("started", converter="extract_combined_ppt_data", total=total)
+
+    for index, (slide_number, text_slide, image_slide) in enumerate(
+            zip((n - 1 for n in slide_numbers), text_prs.slides, image_prs.slides)):
+        try:
+            reporter.check()
+        except ConversionCancelled:
+            thumbnails.close(cancel=True)
+            raise
+        reporter.emit("slide_started", slide=slide_number + 1, index=index, total=total)
+        slide_data = SlideData(slide_number + 1)
 
         for shape_index, text_shape in enumerate(text_slide.shapes):
-            shape_data = {
-                "type": None,
-                "name": text_shape.name,
-                "position": {
-                    "x_pt": emu_to_points(text_shape.left),
-                    "y_pt": emu_to_points(text_shape.top)
-                },
-                "size": {
-                    "width_pt": emu_to_points(text_shape.width),
-                    "height_pt": emu_to_points(text_shape.height)
-                }
-            }
+            shape_data = ShapeData(None, text_shape.name, emu_to_points(text_shape.left), emu_to_points(text_shape.top),
+                                   emu_to_points(text_shape.width), emu_to_points(text_shape.height))
 
             if text_shape.has_text_frame:
-                shape_data["type"] = "text"
+                shape_data.type = "text"
                 paragraphs_data = []
                 full_text = ""
                 for paragraph in text_shape.text_frame.paragraphs:
+                    paragraph_style, run_defaults = styles.paragraph_properties(text_shape, paragraph)
                     runs_data = []
-                    para_text = ""
                     for run in paragraph.runs:
                         text = run.text or ""
-                        para_text += text
                         full_text += text
-                        run_data = {
-                            "text": text,
-                            "font_size_pt": emu_to_points(run.font.size) if run.font.size else None,
-                            "font_name": run.font.name,
-                            "bold": run.font.bold,
-                            "italic": run.font.italic,
-                            "underline": run.font.underline
-                        }
-                        runs_data.append(run_data)
-
-                    para_info = {
-                        "alignment": str(paragraph.alignment).split('.')[-1].lower() if paragraph.alignment else None,
-                        "runs": runs_data,
-                        "line_spacing": emu_to_points(paragraph.line_spacing) if paragraph.line_spacing else None,
-                        "space_before": emu_to_points(paragraph.space_before) if paragraph.space_before else None,
-                        "space_after": emu_to_points(paragraph.space_after) if paragraph.space_after else None
-                    }
-                    paragraphs_data.append(para_info)
-
-                shape_data["content"] = full_text.strip()
-                shape_data["text_properties"] = {
-                    "paragraphs": paragraphs_data,
-                    "vertical_alignment": str(text_shape.text_frame.vertical_anchor).split('.')[-1].lower()
+                        run_style = styles.run_properties(run_defaults, run)
+                        runs_data.append(RunData(
+                            text,
+                            run_style["font_size_pt"],
+                            run_style["font_name"],
+                            run_style["bold"],
+                            run_style["italic"],
+                            run_style["underline"]
+                        ))
+
+                    paragraphs_data.append(ParagraphData(
+                        paragraph_style["alignment"],
+                        runs_data,
+                        paragraph_style["line_spacing"],
+                        paragraph_style["space_before"],
+                        paragraph_style["space_after"]
+                    ))
+
+                shape_data.content = full_text.strip()
+                shape_data.text = TextFrameData(
+                    paragraphs_data,
+                    str(text_shape.text_frame.vertical_anchor).split('.')[-1].lower()
                         if text_shape.text_frame.vertical_anchor else None,
-                    "margin_left_pt": emu_to_points(text_shape.text_frame.margin_left),
-                    "margin_right_pt": emu_to_points(text_shape.text_frame.margin_right),
-                    "margin_top_pt": emu_to_points(text_shape.text_frame.margin_top),
-                    "margin_bottom_pt": emu_to_points(text_shape.text_frame.margin_bottom)
-                }
+                    emu_to_points(text_shape.text_frame.margin_left),
+                    emu_to_points(text_shape.text_frame.margin_right),
+                    emu_to_points(text_shape.text_frame.margin_top),
+                    emu_to_points(text_shape.text_frame.margin_bottom)
+                )
 
-            slide_data["shapes"].append(shape_data)
+            slide_data.shapes.append(shape_data)
 
         for image_shape in image_slide.shapes:
             if image_shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
-                shape_data = {
-                    "type": "image",
-                    "name": image_shape.name,
-                    "position": {
-                        "x_pt": emu_to_points(image_shape.left),
-                        "y_pt": emu_to_points(image_shape.top)
-                    },
-                    "size": {
-                        "width_pt": emu_to_points(image_shape.width),
-                        "height_pt": emu_to_points(image_shape.height)
-                    }
-                }
-
-                image = image_shape.image
-                image_ext = image.ext
-                image_blob = image.blob
+                shape_data = ShapeData("image", image_shape.name, emu_to_points(image_shape.left),
+                                       emu_to_points(image_shape.top), emu_to_points(image_shape.width),
+                                       emu_to_points(image_shape.height))
+
+                image_part = image_shape.part.related_part(image_shape._pic.blip_rId)
+                if image_part.partname in spilled_images:
+                    spilled_path, content_type, image_ext = spilled_images[image_part.partname]
+                    with open(spilled_path, 'rb') as spilled:
+                        image_blob = spilled.read()
+                else:
+                    image = image_shape.image
+                    content_type = image.content_type
+                    image_ext = image.ext
+                    image_blob = image.blob
 
                 if image_blob:
                     image_filename = f"slide{slide_number+1}_img_{uuid.uuid4().hex[:8]}.{image_ext}"
@@ -120,32 +230,51 @@ def extract_combined_ppt_data(text_pptx_path, image_pptx_path, output_json_path=
                     try:
                         with open(image_path, 'wb') as f:
                             f.write(image_blob)
-                        with open(image_path, 'rb') as img_file:
-                            encoded_string = base64.b64encode(img_file.read()).decode('utf-8')
-
-                        shape_data["image_metadata"] = {
-                            "content_type": image.content_type,
-                            "ext": image_ext,
-                            "filename": image_filename,
-                            "saved_path": os.path.abspath(image_path),
-                            "thumbnail_base64": encoded_string
-                        }
+                        reporter.emit("image_written", slide=slide_number + 1, filename=image_filename,
+                                      bytes=len(image_blob))
+                        image_data = ImageData(content_type, image_ext, image_filename, os.path.abspath(image_path))
+                        held_bytes += thumbnails.submit(image_data, image_blob)
+                        shape_data.image = image_data
+                        if budget_bytes:
+                            if image_part.partname not in spilled_images and image_part.partname not in held_image_parts:
+                                held_bytes += len(image_blob)
+                                held_image_parts[image_part.partname] = (image_part, image_path, content_type, image_ext)
                     except Exception as e:
-                        shape_data["image_metadata"] = {"error": str(e)}
+                        shape_data.image = ImageData(error=str(e))
 
-                    slide_data["shapes"].append(shape_data)
+                    slide_data.shapes.append(shape_data)
 
         slides_json.append(slide_data)
+        if budget_bytes:
+            held_bytes += len(json.dumps(slide_data.to_dict(), ensure_ascii=False).encode('utf-8'))
+        reporter.emit("slide_finished", slide=slide_number + 1, index=index, total=total,
+                      shapes=len(slide_data.shapes))
+
+        if budget_bytes and held_bytes > budget_bytes:
+            # Over budget: move finished slides to disk and drop image blobs from the package
+            thumbnails.resolve()
+            if spill_file is None:
+                spill_file = tempfile.TemporaryFile('w+', encoding='utf-8')
+            for record in slides_json:
+                spill_file.write(json.dumps(record.to_dict(), ensure_ascii=False) + "\n")
+            slides_json = []
+            for partname, (part, image_path, content_type, image_ext) in held_image_parts.items():
+                part.blob = b""
+                spilled_images[partname] = (image_path, content_type, image_ext)
+            held_image_parts.clear()
+            held_bytes = 0
 
-    presentation_data = {
-        "slide_width_emu": slide_width,
-        "slide_height_emu": slide_height,
-        "slides": slides_json
-    }
+    thumbnails.close()
 
-    with open(output_json_path, 'w', encoding='utf-8') as f:
-        json.dump(presentation_data, f, indent=4, ensure_ascii=False)
+    if spill_file is None:
+        save_presentation(PresentationData(slide_width, slide_height, slides_json), output_json_path)
+    else:
+        with spill_file, open(output_json_path, 'w', encoding='utf-8') as f:
+            write_presentation_json(f, slide_width, slide_height,
+                                    itertools.chain(iter_spilled_slides(spill_file),
+                                                    (slide.to_dict() for slide in slides_json)))
     print(f"\n✅ JSON saved to: {output_json_path}")
+    reporter.emit("file_written", path=output_json_path)
 
     image_files = [f for f in os.listdir(image_output_dir) if f.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp', '.gif'))]
     zip_path = f"{image_output_dir}.zip"
@@ -153,6 +282,14 @@ def extract_combined_ppt_data(text_pptx_path, image_pptx_path, output_json_path=
         for file in image_files:
             zipf.write(os.path.join(image_output_dir, file), file)
     print(f"✅ Zipped images saved to: {zip_path}")
+    reporter.emit("file_written", path=zip_path)
+
+    if memory_budget_mb:
+        peak = peak_rss_mb()
+        if peak is not None:
+            print(f"📈 Peak RSS: {peak:.1f} MB (budget {memory_budget_mb} MB)")
+    reporter.emit("finished")
 
 # Example usage
-extract_combined_ppt_data("input_blank.pptx", "input.pptx")
+if __name__ == "__main__":
+    extract_combined_ppt_data("input_blank.pptx", "input.pptx")
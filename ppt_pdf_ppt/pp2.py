@@ -1,22 +1,41 @@
 import os
-import json
+import sys
 import fitz  # PyMuPDF
+from slide_range import parse_slide_range
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from docpipe.layout_model import load_presentation, save_presentation
 
 def emu_to_points(emu):
     return emu / 12700.0
 
-def extract_pdf_layout(pdf_path):
+# get_text("dict") defaults plus image blocks; dropping TEXT_PRESERVE_IMAGES keeps fitz from
+# decoding and copying every image just for it to be thrown away
+TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+def iter_text_pages(doc, pages=None, include_images=False):
+    # Yields (page_number, page, textpage); each page is parsed into one TextPage that
+    # every get_text() call on it reuses
+    flags = TEXT_FLAGS | fitz.TEXT_PRESERVE_IMAGES if include_images else TEXT_FLAGS
+    if pages is None:
+        pages = range(1, doc.page_count + 1)
+    for page_num in (n for n in pages if n <= doc.page_count):
+        page = doc.load_page(page_num - 1)
+        yield page_num, page, page.get_textpage(flags=flags)
+
+def extract_pdf_layout(pdf_path, pages=None, include_images=False):
+    # pages: 1-based page numbers to read; None reads every page
     doc = fitz.open(pdf_path)
     layout = []
-    for page_num, page in enumerate(doc):
+    for page_num, page, textpage in iter_text_pages(doc, pages, include_images):
         pdf_width = page.rect.width
         pdf_height = page.rect.height
-        for block in page.get_text("dict")["blocks"]:
+        for block in page.get_text("dict", textpage=textpage)["blocks"]:
             for line in block.get("lines", []):
                 line_text = "".join([span["text"] for span in line["spans"]])
                 bbox = line["bbox"]  # (x0, y0, x1, y1)
                 layout.append({
-                    "slide_number": page_num + 1,
+                    "slide_number": page_num,
                     "text": line_text.strip(),
                     "bbox": bbox,
                     "pdf_width": pdf_width,
@@ -24,45 +43,73 @@ def extract_pdf_layout(pdf_path):
                 })
     return layout
 
+def extract_pdf_lines(pdf_path, pages=None):
+    """Lightweight extract_pdf_layout: one (page, text, bbox) tuple per line.
+
+    Returns (page_sizes, lines) with page_sizes {page: (width, height)}, so the
+    page size is not repeated on every line and no per-line dicts are kept.
+    """
+    doc = fitz.open(pdf_path)
+    page_sizes = {}
+    lines = []
+    for page_num, page, textpage in iter_text_pages(doc, pages):
+        page_sizes[page_num] = (page.rect.width, page.rect.height)
+        for block in page.get_text("dict", textpage=textpage)["blocks"]:
+            for line in block.get("lines", ()):
+                lines.append((page_num, "".join([span["text"] for span in line["spans"]]).strip(), line["bbox"]))
+    return page_sizes, lines
+
 def scale_bbox(bbox, pdf_width, pdf_height, pptx_width_pt, pptx_height_pt):
     scale_x = pptx_width_pt / pdf_width
     scale_y = pptx_height_pt / pdf_height
     x0, y0, x1, y1 = bbox
     return [x0 * scale_x, y0 * scale_y, x1 * scale_x, y1 * scale_y]
 
-def attach_rendered_lines(json_path, pdf_path, output_json="output_with_layout.json"):
-    with open(json_path, 'r', encoding='utf-8') as f:
-        json_data = json.load(f)
+def rendered_lines_by_shape(presentation, pdf_path, slides=None):
+    # Returns {(slide_number, shape_index): [line text, ...]} for text shapes the PDF has lines in
+    pptx_width_pt = emu_to_points(presentation.slide_width_emu)
+    pptx_height_pt = emu_to_points(presentation.slide_height_emu)
+    last_slide = max((slide.slide_number for slide in presentation.slides), default=0)
+    selected = parse_slide_range(slides, last_slide)
+    page_sizes, layout_lines = extract_pdf_lines(pdf_path, selected)
 
-    pptx_width_pt = emu_to_points(json_data["slide_width_emu"])
-    pptx_height_pt = emu_to_points(json_data["slide_height_emu"])
-    layout_lines = extract_pdf_layout(pdf_path)
+    lines_by_slide = {}
+    for slide_num, text, bbox in layout_lines:
+        pdf_width, pdf_height = page_sizes[slide_num]
+        scaled_bbox = scale_bbox(bbox, pdf_width, pdf_height, pptx_width_pt, pptx_height_pt)
+        lines_by_slide.setdefault(slide_num, []).append((scaled_bbox[0], scaled_bbox[1], text))
 
-    for slide in json_data["slides"]:
-        slide_num = slide["slide_number"]
-        for shape in slide["shapes"]:
-            if shape["type"] != "text":
+    result = {}
+    for slide in presentation.slides:
+        slide_num = slide.slide_number
+        if slide_num not in lines_by_slide:
+            continue
+        for shape_index, shape in enumerate(slide.shapes):
+            if shape.type != "text":
                 continue
-            x0 = shape["position"]["x_pt"]
-            y0 = shape["position"]["y_pt"]
-            x1 = x0 + shape["size"]["width_pt"]
-            y1 = y0 + shape["size"]["height_pt"]
+            x0 = shape.x_pt
+            y0 = shape.y_pt
+            x1 = x0 + shape.width_pt
+            y1 = y0 + shape.height_pt
 
             lines_in_shape = []
-            for line in layout_lines:
-                if line["slide_number"] != slide_num:
-                    continue
-                scaled_bbox = scale_bbox(line["bbox"], line["pdf_width"], line["pdf_height"],
-                                         pptx_width_pt, pptx_height_pt)
-                line_x, line_y = scaled_bbox[0], scaled_bbox[1]
+            for line_x, line_y, text in lines_by_slide[slide_num]:
                 if x0 <= line_x <= x1 and y0 <= line_y <= y1:
-                    lines_in_shape.append(line["text"])
+                    lines_in_shape.append(text)
 
             if lines_in_shape:
-                shape["rendered_lines"] = lines_in_shape
+                result[(slide_num, shape_index)] = lines_in_shape
+    return result
+
+def attach_rendered_lines(json_path, pdf_path, output_json="output_with_layout.json", slides=None):
+    # slides: e.g. "40-55"; other slides and their PDF pages are left untouched
+    presentation = load_presentation(json_path)
+
+    slides_by_number = {slide.slide_number: slide for slide in presentation.slides}
+    for (slide_num, shape_index), lines in rendered_lines_by_shape(presentation, pdf_path, slides).items():
+        slides_by_number[slide_num].shapes[shape_index].rendered_lines = lines
 
-    with open(output_json, 'w', encoding='utf-8') as f:
-        json.dump(json_data, f, indent=4, ensure_ascii=False)
+    save_presentation(presentation, output_json)
 
     print(f"\n✅ Enhanced JSON with rendered layout saved to: {output_json}")
 
@@ -74,4 +121,4 @@ if __name__ == "__main__":
     pdf_file = "input.pdf"           # your PDF file
     output_json = "output_with_layout.json"  # output file
 
-    attach_rendered_lines(json_file, pdf_file, output_json)      
\ No newline at end of file
+    attach_rendered_lines(json_file, pdf_file, output_json)      
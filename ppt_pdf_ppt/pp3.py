@@ -1,110 +1,272 @@
-import json
 import os
-import zipfile
 import io
-from pptx import Presentation
+import sys
+import math
+from concurrent.futures import ProcessPoolExecutor
 from pptx.util import Pt
 from pptx.enum.text import PP_ALIGN, MSO_VERTICAL_ANCHOR
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from pptx.opc.package import Part
+from pptx.opc.packuri import PackURI
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from docpipe.image_utils import downsample_for_placement
+from docpipe.layout_model import load_presentation, SlideData, TextFrameData
+from docpipe.pptx_template import new_presentation, find_layout
+from docpipe.opc_writer import save_pptx
+from docpipe.progress import Reporter
+from slide_range import parse_slide_range
+from archive_reader import MappedZip, as_stream
 
 def points_to_emu(pt):
     return round(pt * 12700)
 
 def extract_image_from_zip(zip_path, image_filename):
-    with zipfile.ZipFile(zip_path, 'r') as zipf:
-        with zipf.open(image_filename) as img_file:
-            return io.BytesIO(img_file.read())
-
-def create_ppt_from_json_with_zip(json_path, zip_path, output_pptx="rebuilt_from_layout.pptx"):
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    prs = Presentation()
-
-    if "slide_width_emu" in data and "slide_height_emu" in data:
-        prs.slide_width = data["slide_width_emu"]
-        prs.slide_height = data["slide_height_emu"]
-
-    align_map = {
-        "left": PP_ALIGN.LEFT,
-        "center": PP_ALIGN.CENTER,
-        "right": PP_ALIGN.RIGHT,
-        "justify": PP_ALIGN.JUSTIFY
-    }
-
-    for slide_info in data["slides"]:
-        slide = prs.slides.add_slide(prs.slide_layouts[6])
-
-        for shape in slide_info.get("shapes", []):
-            x = points_to_emu(shape["position"]["x_pt"])
-            y = points_to_emu(shape["position"]["y_pt"])
-            width = points_to_emu(shape["size"]["width_pt"])
-            height = points_to_emu(shape["size"]["height_pt"])
-
-            if shape["type"] == "text":
-                textbox = slide.shapes.add_textbox(left=x, top=y, width=width, height=height)
-                text_frame = textbox.text_frame
-                text_frame.clear()
-
-                props = shape.get("text_properties", {})
-                if props.get("vertical_alignment"):
-                    try:
-                        text_frame.vertical_anchor = getattr(MSO_VERTICAL_ANCHOR, props["vertical_alignment"].upper())
-                    except:
-                        pass
-
-                text_frame.margin_left = points_to_emu(props.get("margin_left_pt", 0))
-                text_frame.margin_right = points_to_emu(props.get("margin_right_pt", 0))
-                text_frame.margin_top = points_to_emu(props.get("margin_top_pt", 0))
-                text_frame.margin_bottom = points_to_emu(props.get("margin_bottom_pt", 0))
-
-                rendered_lines = shape.get("rendered_lines")
-                if rendered_lines:
-                    for i, line in enumerate(rendered_lines):
-                        para = text_frame.add_paragraph() if i > 0 else text_frame.paragraphs[0]
+    # One-off read; the rebuild itself keeps a single MappedZip open instead
+    with MappedZip(zip_path) as archive:
+        return io.BytesIO(archive.read(image_filename))  # copied, so it outlives the map
+
+ALIGN_MAP = {
+    "left": PP_ALIGN.LEFT,
+    "center": PP_ALIGN.CENTER,
+    "right": PP_ALIGN.RIGHT,
+    "justify": PP_ALIGN.JUSTIFY,
+    "justify_low": PP_ALIGN.JUSTIFY_LOW,
+    "distribute": PP_ALIGN.DISTRIBUTE,
+    "thai_distribute": PP_ALIGN.THAI_DISTRIBUTE
+}
+
+def print_image_event(event, filename, error=None):
+    if event == "image_added":
+        print(f"[✓] Added image: {filename}")
+    elif event == "image_failed":
+        print(f"[✗] Could not add image {filename}: {error}")
+
+def add_slide_shapes(slide, slide_info, archive, reporter, image_dpi=None, image_cache_dir=".image_cache",
+                     quiet=False):
+    # Text boxes and pictures of one layout slide record, added to a python-pptx slide
+    # quiet: only emit image events, for workers whose events the parent prints and replays
+    for shape in slide_info.shapes:
+        x = points_to_emu(shape.x_pt)
+        y = points_to_emu(shape.y_pt)
+        width = points_to_emu(shape.width_pt)
+        height = points_to_emu(shape.height_pt)
+
+        if shape.type == "text":
+            textbox = slide.shapes.add_textbox(left=x, top=y, width=width, height=height)
+            text_frame = textbox.text_frame
+            text_frame.clear()
+
+            props = shape.text or TextFrameData()
+            if props.vertical_alignment:
+                try:
+                    text_frame.vertical_anchor = getattr(MSO_VERTICAL_ANCHOR, props.vertical_alignment.upper())
+                except:
+                    pass
+
+            text_frame.margin_left = points_to_emu(props.margin_left_pt)
+            text_frame.margin_right = points_to_emu(props.margin_right_pt)
+            text_frame.margin_top = points_to_emu(props.margin_top_pt)
+            text_frame.margin_bottom = points_to_emu(props.margin_bottom_pt)
+
+            rendered_lines = shape.rendered_lines
+            if rendered_lines:
+                for i, line in enumerate(rendered_lines):
+                    para = text_frame.add_paragraph() if i > 0 else text_frame.paragraphs[0]
+                    run = para.add_run()
+                    run.text = line
+            else:
+                for para_index, para_data in enumerate(props.paragraphs):
+                    para = text_frame.paragraphs[0] if para_index == 0 else text_frame.add_paragraph()
+
+                    if para_data.alignment:
+                        para.alignment = ALIGN_MAP.get(para_data.alignment, PP_ALIGN.LEFT)
+                    if para_data.line_spacing:
+                        para.line_spacing = Pt(para_data.line_spacing)
+                    if para_data.space_before:
+                        para.space_before = Pt(para_data.space_before)
+                    if para_data.space_after:
+                        para.space_after = Pt(para_data.space_after)
+
+                    for run_data in para_data.runs:
                         run = para.add_run()
-                        run.text = line
+                        run.text = run_data.text
+                        if run_data.font_size_pt:
+                            run.font.size = Pt(run_data.font_size_pt)
+                        if run_data.font_name:
+                            run.font.name = run_data.font_name
+                        if run_data.bold is not None:
+                            run.font.bold = run_data.bold
+                        if run_data.italic is not None:
+                            run.font.italic = run_data.italic
+                        if run_data.underline is not None:
+                            run.font.underline = run_data.underline
+
+        elif shape.type == "image":
+            filename = shape.image.filename if shape.image is not None else None
+            if filename:
+                try:
+                    if image_dpi:
+                        image_stream = as_stream(downsample_for_placement(
+                            archive.read(filename), shape.width_pt, shape.height_pt,
+                            image_dpi, cache_dir=image_cache_dir))
+                    else:
+                        image_stream = archive.open(filename)
+                    slide.shapes.add_picture(image_stream, x, y, width=width, height=height)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    if not quiet:
+                        print_image_event("image_failed", filename, error)
+                    reporter.emit("image_failed", slide=slide_info.slide_number, filename=filename, error=error)
+                else:
+                    if not quiet:
+                        print_image_event("image_added", filename)
+                    reporter.emit("image_added", slide=slide_info.slide_number, filename=filename)
+
+def build_slide_chunk(slide_records, zip_path, template_path, layout_name, image_dpi, image_cache_dir):
+    """Worker side of the parallel rebuild: build slides in a private presentation and return their parts.
+
+    slide_records are SlideData tuples. Returns (slides, media) where slides holds
+    (slide XML, [(rId, image sha1, or None for the layout)], progress events) per
+    slide and media maps sha1 -> (blob, ext, content type).
+    """
+    prs = new_presentation(template_path)
+    layout = find_layout(prs, layout_name)
+    built = []
+    media = {}
+    with MappedZip(zip_path) as archive:
+        for record in slide_records:
+            slide_info = SlideData.from_tuple(record)
+            events = []
+            slide = prs.slides.add_slide(layout)
+            add_slide_shapes(slide, slide_info, archive, Reporter(events.append), image_dpi, image_cache_dir,
+                             quiet=True)
+            rels = []
+            for r_id, rel in slide.part.rels.items():
+                if rel.reltype == RT.SLIDE_LAYOUT:
+                    rels.append((r_id, None))
+                elif rel.reltype == RT.IMAGE:
+                    image_part = rel.target_part
+                    media.setdefault(image_part.sha1, (image_part.blob, image_part.partname.ext,
+                                                       image_part.content_type))
+                    rels.append((r_id, image_part.sha1))
                 else:
-                    paragraphs = props.get("paragraphs", [])
-                    for para_index, para_data in enumerate(paragraphs):
-                        para = text_frame.paragraphs[0] if para_index == 0 else text_frame.add_paragraph()
-
-                        if para_data.get("alignment"):
-                            para.alignment = align_map.get(para_data["alignment"], PP_ALIGN.LEFT)
-                        if para_data.get("line_spacing"):
-                            para.line_spacing = Pt(para_data["line_spacing"])
-                        if para_data.get("space_before"):
-                            para.space_before = Pt(para_data["space_before"])
-                        if para_data.get("space_after"):
-                            para.space_after = Pt(para_data["space_after"])
-
-                        for run_data in para_data.get("runs", []):
-                            raw_text = run_data.get("text", "")
-                            run = para.add_run()
-                            run.text = raw_text
-                            if run_data.get("font_size_pt"):
-                                run.font.size = Pt(run_data["font_size_pt"])
-                            if run_data.get("font_name"):
-                                run.font.name = run_data["font_name"]
-                            if run_data.get("bold") is not None:
-                                run.font.bold = run_data["bold"]
-                            if run_data.get("italic") is not None:
-                                run.font.italic = run_data["italic"]
-                            if run_data.get("underline") is not None:
-                                run.font.underline = run_data["underline"]
-
-            elif shape["type"] == "image":
-                metadata = shape.get("image_metadata", {})
-                filename = metadata.get("filename")
-                if filename:
-                    try:
-                        image_stream = extract_image_from_zip(zip_path, filename)
-                        slide.shapes.add_picture(image_stream, x, y, width=width, height=height)
-                        print(f"[✓] Added image: {filename}")
-                    except Exception as e:
-                        print(f"[✗] Could not add image {filename}: {e}")
-
-    prs.save(output_pptx)
+                    raise ValueError(f"unexpected slide relationship {rel.reltype}")
+            built.append((slide.part.blob, rels, events))
+    return built, media
+
+def add_slides_in_workers(prs, layout, slide_infos, zip_path, template_path, layout_name, workers, reporter,
+                          image_dpi=None, image_cache_dir=".image_cache"):
+    # python-pptx objects cannot be shared between processes, so each worker builds a run of
+    # slides on its own copy of the template and sends back the slide XML and relationships.
+    # They are added to prs in order as plain parts; an image used on several slides (or by
+    # several workers) becomes a single media part.
+    package = prs.part.package
+    taken = {str(part.partname) for part in package.iter_parts()}
+    counters = {}
+
+    def next_partname(prefix, ext):
+        # Media is numbered across extensions (image1.jpg, image2.png), as python-pptx does
+        n = counters.get(prefix, 0)
+        while True:
+            n += 1
+            partname = f"{prefix}{n}.{ext}"
+            if partname not in taken:
+                counters[prefix] = n
+                taken.add(partname)
+                return PackURI(partname)
+
+    chunk_size = max(1, math.ceil(len(slide_infos) / (workers * 4)))
+    chunks = [slide_infos[i:i + chunk_size] for i in range(0, len(slide_infos), chunk_size)]
+    media_parts = {}  # sha1 -> Part
+    index = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(build_slide_chunk, [slide_info.to_tuple() for slide_info in chunk], zip_path,
+                               template_path, layout_name, image_dpi, image_cache_dir)
+                   for chunk in chunks]
+        try:
+            for chunk, future in zip(chunks, futures):
+                reporter.check()
+                built, media = future.result()
+                for slide_info, (blob, rels, events) in zip(chunk, built):
+                    reporter.emit("slide_started", slide=slide_info.slide_number, index=index, total=len(slide_infos))
+                    for event in events:
+                        event.pop("elapsed")
+                        name = event.pop("event")
+                        if name in ("image_added", "image_failed"):
+                            print_image_event(name, event["filename"], event.get("error"))
+                        reporter.emit(name, **event)
+
+                    slide_part = Part(next_partname("/ppt/slides/slide", "xml"), CT.PML_SLIDE, package, blob)
+                    for r_id, sha1 in rels:
+                        if sha1 is None:
+                            target, reltype = layout.part, RT.SLIDE_LAYOUT
+                        else:
+                            target, reltype = media_parts.get(sha1), RT.IMAGE
+                            if target is None:
+                                image_blob, ext, content_type = media[sha1]
+                                target = media_parts[sha1] = Part(next_partname("/ppt/media/image", ext),
+                                                                  content_type, package, image_blob)
+                        # rIds are handed out in the same order as in the worker, so the XML's r:embed still match
+                        if slide_part.relate_to(target, reltype) != r_id:
+                            raise RuntimeError(f"relationship {r_id} of slide {slide_info.slide_number} was renumbered")
+                    prs.slides._sldIdLst.add_sldId(prs.part.relate_to(slide_part, RT.SLIDE))
+
+                    reporter.emit("slide_finished", slide=slide_info.slide_number, index=index,
+                                  total=len(slide_infos), shapes=len(slide_info.shapes))
+                    index += 1
+        except BaseException:
+            pool.shutdown(cancel_futures=True)
+            raise
+
+def create_ppt_from_json_with_zip(json_path, zip_path, output_pptx="rebuilt_from_layout.pptx",
+                                  image_dpi=None, image_cache_dir=".image_cache", slides=None,
+                                  template_path=None, layout_name="Blank", xml_level=6, media_level=0,
+                                  on_event=None, cancel=None, workers=None):
+    # image_dpi: resample pictures larger than their placed size needs at this DPI
+    # slides: e.g. "40-55" to rebuild only those slides; images of other slides are never read
+    # template_path: rebuild on this deck's masters and theme; its own slides are dropped
+    # xml_level / media_level: deflate levels for XML parts and for media (0 stores)
+    # on_event / cancel: progress events and cancellation between slides, see docpipe.progress
+    # workers: generate slides in this many processes (add_slides_in_workers); cancellation is
+    #   then checked between runs of slides
+    reporter = Reporter(on_event, cancel)
+    data = load_presentation(json_path)
+
+    prs = new_presentation(template_path)
+    layout = find_layout(prs, layout_name)
+
+    if data.slide_width_emu is not None and data.slide_height_emu is not None:
+        prs.slide_width = data.slide_width_emu
+        prs.slide_height = data.slide_height_emu
+
+    slide_infos = data.slides
+    if slides is not None:
+        selected = set(parse_slide_range(slides, max((s.slide_number for s in slide_infos), default=0)))
+        slide_infos = [s for s in slide_infos if s.slide_number in selected]
+
+    reporter.emit("started", converter="create_ppt_from_json_with_zip", total=len(slide_infos))
+    if workers and workers > 1 and slide_infos:
+        # each worker maps the zip itself
+        add_slides_in_workers(prs, layout, slide_infos, zip_path, template_path, layout_name, workers, reporter,
+                              image_dpi, image_cache_dir)
+    else:
+        # One memory-mapped reader for the whole rebuild; stored members are not copied on read
+        with MappedZip(zip_path) as archive:
+            for index, slide_info in enumerate(slide_infos):
+                reporter.check()
+                reporter.emit("slide_started", slide=slide_info.slide_number, index=index, total=len(slide_infos))
+                slide = prs.slides.add_slide(layout)
+
+                add_slide_shapes(slide, slide_info, archive, reporter, image_dpi, image_cache_dir)
+
+                reporter.emit("slide_finished", slide=slide_info.slide_number, index=index, total=len(slide_infos),
+                              shapes=len(slide_info.shapes))
+
+    save_pptx(prs, output_pptx, xml_level, media_level)
     print(f"\n✅ Presentation saved to: {output_pptx}")
+    reporter.emit("file_written", path=output_pptx)
+    reporter.emit("finished")
 
 # To run:
 # create_ppt_from_json_with_zip("output_with_layout.json", "extracted_images.zip")      
@@ -114,4 +276,4 @@ if __name__ == "__main__":
     zip_file = "extracted_images.zip" # your ZIP file with images
     output_pptx_file = "rebuilt_presentation.pptx"  # output PPTX file
 
-    create_ppt_from_json_with_zip(json_file, zip_file, output_pptx_file)
\ No newline at end of file
+    create_ppt_from_json_with_zip(json_file, zip_file, output_pptx_file)
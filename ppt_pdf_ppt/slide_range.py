@@ -0,0 +1,124 @@
+import io
+import posixpath
+import zipfile
+from lxml import etree
+
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+R_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+P_NS = "http://schemas.openxmlformats.org/presentationml/2006/main"
+
+# Relationship types whose targets are binary media rather than XML structure
+MEDIA_REL_SUFFIXES = ("/image", "/media", "/video", "/audio", "/oleObject", "/package", "/hdphoto")
+
+def parse_slide_range(spec, total=None):
+    """Turn "40-55", "1,3,7-9", "40-" or an iterable of ints into a sorted list of 1-based slide numbers.
+
+    None means every slide and is returned unchanged. Open-ended ranges ("40-")
+    need total.
+    """
+    if spec is None:
+        return None
+    if isinstance(spec, int):
+        return [spec]
+    if not isinstance(spec, str):
+        return sorted(set(int(n) for n in spec))
+
+    numbers = set()
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            start = int(start) if start else 1
+            if not end:
+                if total is None:
+                    raise ValueError(f"open-ended slide range {part!r} needs the slide count")
+                end = total
+            numbers.update(range(start, int(end) + 1))
+        else:
+            numbers.add(int(part))
+    if any(n < 1 for n in numbers):
+        raise ValueError(f"slide numbers start at 1: {spec!r}")
+    return sorted(n for n in numbers if total is None or n <= total)
+
+def _rels_name(partname):
+    directory, name = posixpath.split(partname)
+    return posixpath.join(directory, "_rels", name + ".rels")
+
+def _resolve(base_partname, target):
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_partname), target))
+
+def open_presentation_subset(pptx_path, slides, include_media=True):
+    """Open only the selected slides of a deck.
+
+    Builds an in-memory package holding the presentation-level parts plus the
+    parts reachable from the selected slides, then loads it with python-pptx.
+    Parts used only by other slides are never read or parsed. With
+    include_media=False, image/media parts are left out as well.
+
+    Returns (presentation, slide_numbers) where slide_numbers[i] is the original
+    1-based number of presentation.slides[i].
+    """
+    with zipfile.ZipFile(pptx_path) as zf:
+        names = set(zf.namelist())
+        package_rels = etree.fromstring(zf.read("_rels/.rels"))
+        pres_partname = next(
+            _resolve("", rel.get("Target")) for rel in package_rels.iter(f"{{{REL_NS}}}Relationship")
+            if rel.get("Type").endswith("/officeDocument"))
+
+        pres_xml = etree.fromstring(zf.read(pres_partname))
+        pres_rels = etree.fromstring(zf.read(_rels_name(pres_partname)))
+        rel_targets = {rel.get("Id"): _resolve(pres_partname, rel.get("Target"))
+                       for rel in pres_rels.iter(f"{{{REL_NS}}}Relationship")}
+
+        sld_id_lst = pres_xml.find(f"{{{P_NS}}}sldIdLst")
+        sld_ids = list(sld_id_lst) if sld_id_lst is not None else []
+        selected = set(parse_slide_range(slides, len(sld_ids)))
+        slide_numbers = []
+        dropped_slides = set()
+        for number, sld_id in enumerate(sld_ids, start=1):
+            if number in selected:
+                slide_numbers.append(number)
+            else:
+                dropped_slides.add(rel_targets[sld_id.get(R_ID)])
+                sld_id_lst.remove(sld_id)
+
+        def keep(rel, target):
+            if target in dropped_slides or target not in names:
+                return False
+            return include_media or not rel.get("Type").endswith(MEDIA_REL_SUFFIXES)
+
+        # Walk the relationship graph from the package root, pruning dropped parts
+        parts = {pres_partname: etree.tostring(pres_xml, xml_declaration=True, encoding="UTF-8", standalone=True)}
+        queue = [("", "_rels/.rels")]
+        seen = {""}
+        while queue:
+            partname, rels_name = queue.pop()
+            if rels_name not in names:
+                continue
+            rels = etree.fromstring(zf.read(rels_name))
+            for rel in list(rels):
+                if rel.get("TargetMode") == "External":
+                    continue
+                target = _resolve(partname, rel.get("Target"))
+                if not keep(rel, target):
+                    rels.remove(rel)
+                    continue
+                if target not in seen:
+                    seen.add(target)
+                    if target not in parts:
+                        parts[target] = zf.read(target)
+                    queue.append((target, _rels_name(target)))
+            parts[rels_name] = etree.tostring(rels, xml_declaration=True, encoding="UTF-8", standalone=True)
+        parts["[Content_Types].xml"] = zf.read("[Content_Types].xml")
+
+    from pptx import Presentation  # not needed by callers that only parse ranges
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as out:
+        for name, blob in parts.items():
+            out.writestr(name, blob)
+    buffer.seek(0)
+    return Presentation(buffer), slide_numbers
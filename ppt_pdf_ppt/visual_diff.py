@@ -0,0 +1,126 @@
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import fitz  # PyMuPDF
+from pp1111 import convert_pptx_to_pdf
+
+def render_gray(page, dpi):
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    # Rows may be padded, so reshape by stride and trim to the visible width
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+
+def save_heatmap(base, diff, path):
+    # Dimmed original in every channel with the difference painted over it in red
+    dimmed = (base // 3).astype(np.uint8)
+    rgb = np.stack([np.maximum(dimmed, diff), dimmed, dimmed], axis=-1)
+    height, width = diff.shape
+    fitz.Pixmap(fitz.csRGB, width, height, np.ascontiguousarray(rgb).tobytes(), 0).save(path)
+
+def compare_page_range(original_pdf, rebuilt_pdf, page_indices, dpi, heatmap_dir, pixel_threshold):
+    original_doc = fitz.open(original_pdf)
+    rebuilt_doc = fitz.open(rebuilt_pdf)
+    results = []
+    for index in page_indices:
+        a = render_gray(original_doc.load_page(index), dpi)
+        b = render_gray(rebuilt_doc.load_page(index), dpi)
+        # Slide sizes should match; compare the common area if they do not
+        height, width = min(a.shape[0], b.shape[0]), min(a.shape[1], b.shape[1])
+        a, b = a[:height, :width], b[:height, :width]
+        diff = np.abs(a.astype(np.int16) - b.astype(np.int16)).astype(np.uint8)
+
+        result = {
+            "slide_number": index + 1,
+            "score": float(diff.mean() / 255.0),
+            "changed_fraction": float(np.count_nonzero(diff > pixel_threshold) / diff.size),
+            "heatmap": None
+        }
+        if heatmap_dir and result["changed_fraction"] > 0:
+            result["heatmap"] = os.path.join(heatmap_dir, f"slide{index + 1}_diff.png")
+            save_heatmap(a, diff, result["heatmap"])
+        results.append(result)
+    return results
+
+def to_pdf(path, output_dir):
+    if path.lower().endswith(".pdf"):
+        return path
+    os.makedirs(output_dir, exist_ok=True)
+    pdf_path = os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0] + ".pdf")
+    # convert_pptx_to_pdf only prints failures; remove a PDF left by an earlier run so one can't be mistaken for the other
+    if os.path.exists(pdf_path):
+        os.remove(pdf_path)
+    convert_pptx_to_pdf(path, pdf_path)
+    if not os.path.exists(pdf_path):
+        raise RuntimeError(f"PDF conversion failed for {path}")
+    return pdf_path
+
+def compare_decks(original, rebuilt, output_dir="visual_diff", dpi=30, workers=None, pixel_threshold=32,
+                  heatmaps=True):
+    """Render two decks (PPTX or already-converted PDF) and score every slide.
+
+    score is the mean absolute pixel difference (0 = identical, 1 = inverted)
+    and changed_fraction the share of pixels that differ by more than
+    pixel_threshold grey levels. Pages are rendered and compared in a process
+    pool, a chunk of pages per worker.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    original_pdf = to_pdf(original, os.path.join(output_dir, "original"))
+    rebuilt_pdf = to_pdf(rebuilt, os.path.join(output_dir, "rebuilt"))
+    heatmap_dir = os.path.join(output_dir, "heatmaps") if heatmaps else None
+    if heatmap_dir:
+        os.makedirs(heatmap_dir, exist_ok=True)
+
+    with fitz.open(original_pdf) as a, fitz.open(rebuilt_pdf) as b:
+        original_pages, rebuilt_pages = a.page_count, b.page_count
+    page_count = min(original_pages, rebuilt_pages)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, page_count or 1))
+    chunks = [list(range(page_count))[i::workers] for i in range(workers)]
+    slides = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(compare_page_range, original_pdf, rebuilt_pdf, chunk, dpi, heatmap_dir,
+                               pixel_threshold) for chunk in chunks if chunk]
+        for future in futures:
+            slides.extend(future.result())
+    slides.sort(key=lambda s: s["slide_number"])
+
+    report = {
+        "original": original,
+        "rebuilt": rebuilt,
+        "dpi": dpi,
+        "original_pages": original_pages,
+        "rebuilt_pages": rebuilt_pages,
+        "max_score": max((s["score"] for s in slides), default=0.0),
+        "slides": slides
+    }
+    with open(os.path.join(output_dir, "report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pixel-diff an original deck against its rebuild.")
+    parser.add_argument("original", help="original .pptx or .pdf")
+    parser.add_argument("rebuilt", help="rebuilt .pptx or .pdf")
+    parser.add_argument("-o", "--output-dir", default="visual_diff")
+    parser.add_argument("--dpi", type=int, default=30)
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--fail-above", type=float, default=None,
+                        help="exit with status 1 if any slide scores above this")
+    parser.add_argument("--no-heatmaps", action="store_true")
+    args = parser.parse_args()
+
+    report = compare_decks(args.original, args.rebuilt, args.output_dir, args.dpi, args.workers,
+                           heatmaps=not args.no_heatmaps)
+    for slide in report["slides"]:
+        flag = "⚠️" if args.fail_above is not None and slide["score"] > args.fail_above else "  "
+        print(f"{flag} slide {slide['slide_number']:>4}: score {slide['score']:.4f}, "
+              f"changed {slide['changed_fraction'] * 100:.2f}%")
+    if report["original_pages"] != report["rebuilt_pages"]:
+        print(f"⚠️ Page count differs: {report['original_pages']} vs {report['rebuilt_pages']}")
+    print(f"✅ Report saved to: {os.path.join(args.output_dir, 'report.json')}")
+
+    failed = args.fail_above is not None and (
+        report["max_score"] > args.fail_above or report["original_pages"] != report["rebuilt_pages"])
+    sys.exit(1 if failed else 0)
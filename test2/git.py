@@ -5,11 +5,46 @@ from docx.shared import Pt
 from PIL import Image
 import io
 import os
+import sys
+import argparse
+import posixpath
+from zipfile import ZipFile
+from lxml import etree
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 
-def extract_paragraph_style(paragraph):
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from docpipe.progress import Reporter, ConversionCancelled
+from docpipe.docx_styles import StyleResolver
+
+PROGRESS_EVERY = 100  # paragraphs between paragraphs_finished events
+
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+W_BODY, W_P, W_R, W_TBL, W_TR, W_TC = (f"{{{W_NS}}}{tag}" for tag in ("body", "p", "r", "tbl", "tr", "tc"))
+W_T, W_TAB, W_PTAB, W_CR, W_BR = (f"{{{W_NS}}}{tag}" for tag in ("t", "tab", "ptab", "cr", "br"))
+W_NO_BREAK_HYPHEN = f"{{{W_NS}}}noBreakHyphen"
+W_TC_PR, W_TR_PR, W_GRID_SPAN, W_GRID_BEFORE, W_V_MERGE = (
+    f"{{{W_NS}}}{tag}" for tag in ("tcPr", "trPr", "gridSpan", "gridBefore", "vMerge"))
+W_TYPE, W_VAL = f"{{{W_NS}}}type", f"{{{W_NS}}}val"
+XML_PARSER = etree.XMLParser(resolve_entities=False, huge_tree=True)
+
+def extract_paragraph_style(paragraph, resolver=None):
+    # resolver: a docpipe.docx_styles.StyleResolver, so inherited formatting is filled in
+    # instead of None; without one only direct run formatting is reported
     alignment = str(paragraph.alignment) if paragraph.alignment else "None"
     runs = []
     for run in paragraph.runs:
+        if resolver is not None:
+            properties = resolver.run_properties(run, paragraph)
+            runs.append({
+                "text": run.text,
+                "bold": properties["bold"],
+                "italic": properties["italic"],
+                "underline": properties["underline"],
+                "font_name": properties["font_name"],
+                "font_size": properties["font_size"],
+            })
+            continue
         font = run.font
         run_info = {
             "text": run.text,
@@ -45,41 +80,236 @@ def extract_images(docx_path):
         print(f"Error reading images: {e}")
     return image_data
 
-def extract_docx_to_json(file_path):
+def run_text(r):
+    # Same text as python-docx's Run.text
+    parts = []
+    for e in r:
+        if e.tag == W_T:
+            parts.append(e.text or "")
+        elif e.tag in (W_TAB, W_PTAB):
+            parts.append("\t")
+        elif e.tag == W_CR or (e.tag == W_BR and e.get(W_TYPE) in (None, "textWrapping")):
+            parts.append("\n")
+        elif e.tag == W_NO_BREAK_HYPHEN:
+            parts.append("-")
+    return "".join(parts)
+
+def paragraph_text(p):
+    return "".join(run_text(r) for r in p.iterchildren(W_R))
+
+def _int_property(properties, tag, default):
+    element = properties.find(tag) if properties is not None else None
+    return int(element.get(W_VAL)) if element is not None else default
+
+def table_rows(tbl):
+    # Same cells as python-docx's row.cells: a horizontally merged cell is repeated for every grid
+    # column it spans, and a vertically merged one repeats the cell above it
+    rows = []
+    above = {}  # grid column -> cell in the previous row
+    for tr in tbl.iterchildren(W_TR):
+        grid = _int_property(tr.find(W_TR_PR), W_GRID_BEFORE, 0)
+        row = []
+        current = {}
+        for tc in tr.iterchildren(W_TC):
+            tc_pr = tc.find(W_TC_PR)
+            span = _int_property(tc_pr, W_GRID_SPAN, 1)
+            v_merge = tc_pr.find(W_V_MERGE) if tc_pr is not None else None
+            if v_merge is not None and v_merge.get(W_VAL, "continue") == "continue" and grid in above:
+                cell = above[grid]
+            else:
+                cell = [{"text": paragraph_text(p)} for p in tc.iterchildren(W_P)]
+            row.extend([cell] * span)
+            current[grid] = cell
+            grid += span
+        rows.append(row)
+        above = current
+    return rows
+
+def main_document_xml(docx_zip):
+    rels = etree.fromstring(docx_zip.read("_rels/.rels"), XML_PARSER)
+    for rel in rels.iter(f"{{{REL_NS}}}Relationship"):
+        if rel.get("Type").endswith("/officeDocument"):
+            return docx_zip.read(posixpath.normpath(rel.get("Target").lstrip("/")))
+    raise ValueError("no main document part")
+
+def extract_docx_text(file_path, reporter):
+    """Text-only profile: read word/document.xml alone, never the media, styles or other parts.
+
+    Paragraphs are {"text": ...}; tables keep their rows and cells. There is no
+    "images" key and no run formatting.
+    """
+    with ZipFile(file_path, 'r') as docx_zip:
+        body = etree.fromstring(main_document_xml(docx_zip), XML_PARSER).find(W_BODY)
+
+    paragraphs = body.findall(W_P)
+    reporter.emit("started", converter="extract_docx_text", total=len(paragraphs))
+    doc_json = {"paragraphs": [], "tables": []}
+    for done, p in enumerate(paragraphs, 1):
+        reporter.check()
+        doc_json["paragraphs"].append({"text": paragraph_text(p)})
+        if done % PROGRESS_EVERY == 0 or done == len(paragraphs):
+            reporter.emit("paragraphs_finished", done=done, total=len(paragraphs))
+
+    for tbl in body.iterchildren(W_TBL):
+        reporter.check()
+        doc_json["tables"].append(table_rows(tbl))
+    reporter.emit("finished")
+    return doc_json
+
+def extract_docx_to_json(file_path, on_event=None, cancel=None, text_only=False):
+    # on_event / cancel: progress events and cancellation between paragraphs, see docpipe.progress
+    # text_only: skip images and run formatting, see extract_docx_text
+    reporter = Reporter(on_event, cancel)
     try:
+        if text_only:
+            return extract_docx_text(file_path, reporter)
         document = Document(file_path)
+        resolver = StyleResolver(document)
         doc_json = {
             "paragraphs": [],
             "images": extract_images(file_path),
             "tables": []
         }
 
-        for para in document.paragraphs:
-            para_data = extract_paragraph_style(para)
+        paragraphs = document.paragraphs
+        reporter.emit("started", converter="extract_docx_to_json", total=len(paragraphs))
+        for done, para in enumerate(paragraphs, 1):
+            reporter.check()
+            para_data = extract_paragraph_style(para, resolver)
             doc_json["paragraphs"].append(para_data)
+            if done % PROGRESS_EVERY == 0 or done == len(paragraphs):
+                reporter.emit("paragraphs_finished", done=done, total=len(paragraphs))
 
         for table in document.tables:
+            reporter.check()
             table_data = []
             for row in table.rows:
                 row_data = []
                 for cell in row.cells:
-                    cell_data = [extract_paragraph_style(p) for p in cell.paragraphs]
+                    cell_data = [extract_paragraph_style(p, resolver) for p in cell.paragraphs]
                     row_data.append(cell_data)
                 table_data.append(row_data)
             doc_json["tables"].append(table_data)
 
+        reporter.emit("finished")
         return doc_json
 
+    except ConversionCancelled:
+        raise
     except Exception as e:
         return {"error": str(e)}
 
+def _unique_name(relative_name, taken):
+    # a/report.docx and b/report.docx (or the same file inside two scanned directories)
+    # would share an output name; later ones become report_2.docx, report_3.docx, ...
+    stem, ext = os.path.splitext(relative_name)
+    name, n = relative_name, 1
+    while name.lower() in taken:  # lower(): the output directory may be case-insensitive
+        n += 1
+        name = f"{stem}_{n}{ext}"
+    taken.add(name.lower())
+    return name
+
+def iter_docx_paths(paths):
+    """Yield (file_path, relative_name) for every .docx file in paths (files or directories).
+
+    Files are named by their path below the scanned directory, or by their basename
+    when passed directly; relative names are unique across the whole run.
+    """
+    taken = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    # Skip Word lock files ("~$name.docx")
+                    if name.lower().endswith(".docx") and not name.startswith("~$"):
+                        file_path = os.path.join(root, name)
+                        yield file_path, _unique_name(os.path.relpath(file_path, path), taken)
+        else:
+            yield path, _unique_name(os.path.basename(path), taken)
+
+def _extract_record(file_path, relative_name, text_only=False):
+    return file_path, relative_name, extract_docx_to_json(file_path, text_only=text_only)
+
+def batch_extract_docx(paths, workers=None, max_pending=None, text_only=False):
+    """Extract many documents in a bounded process pool.
+
+    Yields (file_path, relative_name, result) in completion order. At most
+    max_pending documents are queued at once, so huge directories are streamed
+    rather than submitted up front.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for file_path, relative_name in iter_docx_paths(paths):
+            pending.add(pool.submit(_extract_record, file_path, relative_name, text_only))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+def write_json_atomic(data, output_path, indent=2):
+    # Write to a temp file next to the target and rename, so readers never see partial output
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+    os.replace(tmp_path, output_path)
+
+def run_batch(paths, ndjson_path=None, out_dir=None, workers=None, text_only=False):
+    ndjson_file = None
+    if ndjson_path == "-":
+        ndjson_file = sys.stdout
+    elif ndjson_path:
+        ndjson_file = open(ndjson_path, "w", encoding="utf-8")
+
+    count = failed = 0
+    try:
+        for file_path, relative_name, result in batch_extract_docx(paths, workers=workers, text_only=text_only):
+            count += 1
+            if "error" in result:
+                failed += 1
+                print(f"❌ {file_path}: {result['error']}", file=sys.stderr)
+            if ndjson_file is not None:
+                record = {"path": file_path}
+                record.update(result)
+                ndjson_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                ndjson_file.flush()
+            if out_dir:
+                output_path = os.path.join(out_dir, os.path.splitext(relative_name)[0] + ".json")
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                write_json_atomic(result, output_path)
+    finally:
+        if ndjson_file is not None and ndjson_file is not sys.stdout:
+            ndjson_file.close()
+
+    print(f"✅ Processed {count} document(s), {failed} failed", file=sys.stderr)
+    return failed
+
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) != 2:
-        print("Usage: python docx_to_json.py <file_path>")
+    parser = argparse.ArgumentParser(description="Export DOCX files to JSON.")
+    parser.add_argument("paths", nargs="+", help=".docx files or directories to scan")
+    parser.add_argument("-o", "--output", default="output.json",
+                        help="output path when converting a single file (default: output.json)")
+    parser.add_argument("--ndjson", metavar="PATH",
+                        help="write one JSON record per document to PATH ('-' for stdout)")
+    parser.add_argument("--out-dir", help="write one <name>.json per document into this directory")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of worker processes (default: CPU count)")
+    parser.add_argument("--text-only", action="store_true", help="text and structure only: no images or run styles")
+    args = parser.parse_args()
+
+    single_file = len(args.paths) == 1 and not os.path.isdir(args.paths[0])
+    if single_file and not args.ndjson and not args.out_dir:
+        result = extract_docx_to_json(args.paths[0], text_only=args.text_only)
+        write_json_atomic(result, args.output)
+        print(f"✅ JSON exported to {args.output}")
     else:
-        file_path = sys.argv[1]
-        result = extract_docx_to_json(file_path)
-        with open("output.json", "w", encoding="utf-8") as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
-        print("✅ JSON exported to output.json")
+        # Batch mode streams NDJSON to stdout unless told otherwise
+        ndjson_path = args.ndjson or (None if args.out_dir else "-")
+        sys.exit(1 if run_batch(args.paths, ndjson_path, args.out_dir, args.workers, args.text_only) else 0)
@@ -1,51 +1,42 @@
 import os
-import json
 import uuid
-import base64
 import zipfile
+import sys
 from pptx import Presentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from docpipe.image_utils import ThumbnailJobs
+from docpipe.layout_model import ShapeData, ImageData, load_presentation, save_presentation
+
 def emu_to_points(emu):
     return emu / 12700.0
 
-def is_match(pos1, size1, pos2, size2, tolerance=1.5):
+def is_match(shape1, shape2, tolerance=1.5):
     """Check if two shapes have roughly the same position and size (in points)."""
-    for key in pos1:
-        if abs(pos1[key] - pos2[key]) > tolerance:
-            return False
-    for key in size1:
-        if abs(size1[key] - size2[key]) > tolerance:
-            return False
-    return True
-
-def update_blank_json_with_images_precise(blank_json_path, original_pptx_path, output_json="output_data.json", image_output_dir="extracted_images"):
-    with open(blank_json_path, 'r', encoding='utf-8') as f:
-        json_data = json.load(f)
+    return (abs(shape1.x_pt - shape2.x_pt) <= tolerance and abs(shape1.y_pt - shape2.y_pt) <= tolerance
+            and abs(shape1.width_pt - shape2.width_pt) <= tolerance
+            and abs(shape1.height_pt - shape2.height_pt) <= tolerance)
+
+def update_blank_json_with_images_precise(blank_json_path, original_pptx_path, output_json="output_data.json", image_output_dir="extracted_images",
+                                          thumbnail_max_edge=120, thumbnail_format="webp", thumbnail_cache_dir=".thumbnail_cache"):
+    json_data = load_presentation(blank_json_path)
 
     prs = Presentation(original_pptx_path)
     os.makedirs(image_output_dir, exist_ok=True)
+    thumbnails = ThumbnailJobs(thumbnail_max_edge, thumbnail_format, thumbnail_cache_dir)
 
     for slide_index, slide in enumerate(prs.slides):
-        if slide_index >= len(json_data["slides"]):
+        if slide_index >= len(json_data.slides):
             continue
 
-        slide_data = json_data["slides"][slide_index]
+        slide_data = json_data.slides[slide_index]
 
         # Remove image placeholders
-        slide_data["shapes"] = [s for s in slide_data["shapes"] if s["type"] != "image"]
+        slide_data.shapes = [s for s in slide_data.shapes if s.type != "image"]
 
         for shape in slide.shapes:
             if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
-                shape_position = {
-                    "x_pt": emu_to_points(shape.left),
-                    "y_pt": emu_to_points(shape.top)
-                }
-                shape_size = {
-                    "width_pt": emu_to_points(shape.width),
-                    "height_pt": emu_to_points(shape.height)
-                }
-
                 image = shape.image
                 image_ext = image.ext
                 image_blob = image.blob
@@ -58,39 +49,31 @@ def update_blank_json_with_images_precise(blank_json_path, original_pptx_path, o
                         with open(image_path, 'wb') as f:
                             f.write(image_blob)
 
-                        with open(image_path, 'rb') as img_file:
-                            encoded_string = base64.b64encode(img_file.read()).decode('utf-8')
-
-                        image_shape_data = {
-                            "type": "image",
-                            "name": shape.name,
-                            "position": shape_position,
-                            "size": shape_size,
-                            "image_metadata": {
-                                "content_type": image.content_type,
-                                "ext": image_ext,
-                                "filename": image_filename,
-                                "saved_path": os.path.abspath(image_path),
-                                "thumbnail_base64": encoded_string
-                            }
-                        }
+                        image_metadata = ImageData(image.content_type, image_ext, image_filename,
+                                                   os.path.abspath(image_path))
+                        thumbnails.submit(image_metadata, image_blob)
+
+                        image_shape_data = ShapeData("image", shape.name, emu_to_points(shape.left),
+                                                     emu_to_points(shape.top), emu_to_points(shape.width),
+                                                     emu_to_points(shape.height), image=image_metadata)
 
                         # Match to JSON by position/size if desired (optional)
                         matched = False
-                        for json_shape in slide_data["shapes"]:
-                            if json_shape["type"] == "image":
-                                if is_match(json_shape["position"], json_shape["size"], shape_position, shape_size):
+                        for json_shape in slide_data.shapes:
+                            if json_shape.type == "image":
+                                if is_match(json_shape, image_shape_data):
                                     matched = True
                                     break
 
-                        slide_data["shapes"].append(image_shape_data)
+                        slide_data.shapes.append(image_shape_data)
 
                     except Exception as e:
                         print(f"⚠️ Could not extract image: {e}")
 
+    thumbnails.close()
+
     # Save updated JSON
-    with open(output_json, 'w', encoding='utf-8') as f:
-        json.dump(json_data, f, indent=4, ensure_ascii=False)
+    save_presentation(json_data, output_json)
     print(f"\n✅ Final JSON with precise image metadata saved to: {output_json}")
 
     # Zip image folder
@@ -1,9 +1,16 @@
 import os
-import json
+import io
+import sys
 import zipfile
-from pptx import Presentation
 from pptx.util import Pt
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from docpipe.image_utils import downsample_for_placement
+from docpipe.layout_model import load_presentation
+from docpipe.pptx_template import new_presentation, find_layout
+from docpipe.opc_writer import save_pptx
+from docpipe.progress import Reporter
+
 def points_to_emu(pt):
     return int(pt * 12700)
 
@@ -13,50 +20,67 @@ def extract_images_from_zip(zip_path, extract_dir):
 
 def get_text_from_shape(shape):
     # Try to get text from 'content', else reconstruct from text_properties
-    if shape.get("content"):
-        return shape["content"]
+    if shape.content:
+        return shape.content
     # Try to reconstruct from text_properties
-    text_props = shape.get("text_properties")
-    if text_props and "paragraphs" in text_props:
-        paras = []
-        for para in text_props["paragraphs"]:
-            para_text = "".join(run.get("text", "") for run in para.get("runs", []))
-            paras.append(para_text)
-        return "\n".join(paras)
+    if shape.text is not None:
+        return "\n".join(para.text for para in shape.text.paragraphs)
     return ""
 
-def build_pptx_from_json(json_path, images_dir, output_pptx="rebuilt_presentation.pptx"):
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+def build_pptx_from_json(json_path, images_dir, output_pptx="rebuilt_presentation.pptx",
+                         image_dpi=None, image_cache_dir=".image_cache", template_path=None, layout_name="Blank",
+                         xml_level=6, media_level=0, on_event=None, cancel=None):
+    # image_dpi: resample pictures larger than their placed size needs at this DPI
+    # template_path: rebuild on this deck's masters and theme; its own slides are dropped
+    # xml_level / media_level: deflate levels for XML parts and for media (0 stores)
+    # on_event / cancel: progress events and cancellation between slides, see docpipe.progress
+    reporter = Reporter(on_event, cancel)
+    data = load_presentation(json_path)
 
-    prs = Presentation()
-    prs.slide_width = points_to_emu(data["slide_width_emu"] / 12700.0)
-    prs.slide_height = points_to_emu(data["slide_height_emu"] / 12700.0)
+    prs = new_presentation(template_path)
+    layout = find_layout(prs, layout_name)
+    prs.slide_width = points_to_emu(data.slide_width_emu / 12700.0)
+    prs.slide_height = points_to_emu(data.slide_height_emu / 12700.0)
 
-    for slide_data in data["slides"]:
-        slide = prs.slides.add_slide(prs.slide_layouts[6])  # blank slide
-        for shape in slide_data["shapes"]:
-            if shape["type"] == "text":
-                left = points_to_emu(shape["position"]["x_pt"])
-                top = points_to_emu(shape["position"]["y_pt"])
-                width = points_to_emu(shape["size"]["width_pt"])
-                height = points_to_emu(shape["size"]["height_pt"])
+    total = len(data.slides)
+    reporter.emit("started", converter="build_pptx_from_json", total=total)
+    for index, slide_data in enumerate(data.slides):
+        reporter.check()
+        reporter.emit("slide_started", slide=slide_data.slide_number, index=index, total=total)
+        slide = prs.slides.add_slide(layout)  # blank slide
+        for shape in slide_data.shapes:
+            if shape.type == "text":
+                left = points_to_emu(shape.x_pt)
+                top = points_to_emu(shape.y_pt)
+                width = points_to_emu(shape.width_pt)
+                height = points_to_emu(shape.height_pt)
                 txBox = slide.shapes.add_textbox(left, top, width, height)
                 tf = txBox.text_frame
                 tf.text = get_text_from_shape(shape)
-            elif shape["type"] == "image":
-                img_path = os.path.join(images_dir, shape["image_metadata"]["filename"])
-                left = points_to_emu(shape["position"]["x_pt"])
-                top = points_to_emu(shape["position"]["y_pt"])
-                width = points_to_emu(shape["size"]["width_pt"])
-                height = points_to_emu(shape["size"]["height_pt"])
+            elif shape.type == "image":
+                img_path = os.path.join(images_dir, shape.image.filename)
+                left = points_to_emu(shape.x_pt)
+                top = points_to_emu(shape.y_pt)
+                width = points_to_emu(shape.width_pt)
+                height = points_to_emu(shape.height_pt)
                 if os.path.exists(img_path):
-                    slide.shapes.add_picture(img_path, left, top, width, height)
+                    picture = img_path
+                    if image_dpi:
+                        with open(img_path, 'rb') as f:
+                            picture = io.BytesIO(downsample_for_placement(
+                                f.read(), shape.width_pt, shape.height_pt,
+                                image_dpi, cache_dir=image_cache_dir))
+                    slide.shapes.add_picture(picture, left, top, width, height)
+                    reporter.emit("image_added", slide=slide_data.slide_number, filename=shape.image.filename)
                 else:
                     print(f"Image not found: {img_path}")
+        reporter.emit("slide_finished", slide=slide_data.slide_number, index=index, total=total,
+                      shapes=len(slide_data.shapes))
 
-    prs.save(output_pptx)
+    save_pptx(prs, output_pptx, xml_level, media_level)
     print(f"✅ PPTX generated: {output_pptx}")
+    reporter.emit("file_written", path=output_pptx)
+    reporter.emit("finished")
 
 if __name__ == "__main__":
     json_path = "output_data.json"
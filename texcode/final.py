@@ -1,7 +1,17 @@
 import subprocess
 import os
+import sys
+import shutil
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-def latex_to_docx(tex_file, output_docx, image_dir="images"):
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from docpipe.progress import Reporter
+
+def latex_to_docx(tex_file, output_docx, image_dir="images", timeout=None, on_event=None, cancel=None):
+    # on_event / cancel: see docpipe.progress; cancelling kills pandoc and raises ConversionCancelled
     # Ensure the .tex file exists
     if not os.path.isfile(tex_file):
         raise FileNotFoundError(f"{tex_file} not found")
@@ -15,11 +25,128 @@ def latex_to_docx(tex_file, output_docx, image_dir="images"):
     ]
 
     try:
-        # Run the conversion
-        subprocess.run(command, check=True)
+        # Run the conversion; on timeout or cancellation pandoc is killed before raising
+        reporter = Reporter(on_event, cancel)
+        reporter.run(command, check=True, timeout=timeout)
         print(f"✅ Word file generated: {output_docx}")
+        reporter.emit("file_written", path=output_docx)
+        return True
     except subprocess.CalledProcessError as e:
         print("❌ Pandoc failed:", e)
+    except subprocess.TimeoutExpired:
+        print(f"❌ Pandoc timed out after {timeout}s and was killed: {tex_file}")
+    return False
+
+_pandoc_version = None
+
+def pandoc_version():
+    global _pandoc_version
+    if _pandoc_version is None:
+        result = subprocess.run(["pandoc", "--version"], capture_output=True, text=True, check=True)
+        _pandoc_version = result.stdout.splitlines()[0]
+    return _pandoc_version
+
+def file_sha256(path, digest=None):
+    digest = digest or hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest
+
+def resource_dir_digest(image_dir):
+    # Hash every file under the resource path so an edited image invalidates the cache
+    digest = hashlib.sha256()
+    if os.path.isdir(image_dir):
+        for root, dirs, files in os.walk(image_dir):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                digest.update(os.path.relpath(path, image_dir).encode("utf-8") + b"\0")
+                file_sha256(path, digest)
+    return digest.hexdigest()
+
+def iter_tex_files(sources):
+    if isinstance(sources, str):
+        sources = [sources]
+    for source in sources:
+        if os.path.isdir(source):
+            for name in sorted(os.listdir(source)):
+                if name.lower().endswith(".tex"):
+                    yield os.path.join(source, name)
+        else:
+            yield source
+
+def _unique_path(path, taken):
+    # a/x.tex and b/x.tex would both write x.docx; later ones become x_2.docx, x_3.docx, ...
+    stem, ext = os.path.splitext(path)
+    candidate, n = path, 1
+    while os.path.normcase(os.path.abspath(candidate)).lower() in taken:
+        n += 1
+        candidate = f"{stem}_{n}{ext}"
+    taken.add(os.path.normcase(os.path.abspath(candidate)).lower())
+    return candidate
+
+def latex_to_docx_many(sources, output_dir, image_dir="images", workers=None, timeout=300,
+                       cache_dir=".pandoc_cache"):
+    """Convert a list or directory of .tex files with a bounded pool of pandoc processes.
+
+    Each result is cached under cache_dir, keyed by the .tex hash, the contents of
+    image_dir and the pandoc version, so unchanged sources are copied instead of
+    reconverted. Inputs with the same name get numbered outputs (x.docx, x_2.docx).
+    Returns {tex_file: output_docx or None on failure}.
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Shared by every job in the batch, so computed once
+    common_key = pandoc_version() + "\0" + resource_dir_digest(image_dir)
+
+    taken = set()
+    jobs = []
+    for tex_file in iter_tex_files(sources):
+        output_docx = os.path.join(output_dir, os.path.splitext(os.path.basename(tex_file))[0] + ".docx")
+        jobs.append((tex_file, _unique_path(output_docx, taken)))
+
+    def convert(job):
+        tex_file, output_docx = job
+        try:
+            cache_key = file_sha256(tex_file, hashlib.sha256(common_key.encode("utf-8"))).hexdigest()
+            cached_docx = os.path.join(cache_dir, cache_key + ".docx")
+            if os.path.exists(cached_docx):
+                shutil.copyfile(cached_docx, output_docx)
+                print(f"✅ Word file from cache: {output_docx}")
+                return tex_file, output_docx
+            if not latex_to_docx(tex_file, output_docx, image_dir, timeout):
+                return tex_file, None
+            tmp_path = f"{cached_docx}.{os.getpid()}.{threading.get_ident()}.tmp"
+            shutil.copyfile(output_docx, tmp_path)
+            os.replace(tmp_path, cached_docx)
+            return tex_file, output_docx
+        except Exception as e:
+            # One unreadable input (or pandoc vanishing) must not lose the rest of the batch
+            print(f"❌ Could not convert {tex_file}: {e}")
+            return tex_file, None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = dict(pool.map(convert, jobs))
+
+    converted = sum(1 for docx in results.values() if docx)
+    print(f"✅ Converted {converted}/{len(results)} file(s)")
+    return results
 
 if __name__ == "__main__":
-    latex_to_docx("small_highlighted_output.tex", "converted_output.docx", image_dir="images")
+    parser = argparse.ArgumentParser(description="Convert LaTeX files to Word with pandoc.")
+    parser.add_argument("sources", nargs="*", help=".tex files or directories (batch mode)")
+    parser.add_argument("-o", "--output-dir", default="converted")
+    parser.add_argument("--image-dir", default="images")
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=int, default=300, help="per-file pandoc timeout in seconds")
+    parser.add_argument("--cache-dir", default=".pandoc_cache")
+    args = parser.parse_args()
+
+    if args.sources:
+        latex_to_docx_many(args.sources, args.output_dir, args.image_dir, args.workers,
+                           args.timeout, args.cache_dir)
+    else:
+        latex_to_docx("small_highlighted_output.tex", "converted_output.docx", image_dir="images")
@@ -1,13 +1,31 @@
 import os
 import re
+import sys
 from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_COLOR_INDEX
-from docx.shared import RGBColor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from docpipe.progress import Reporter, ConversionCancelled
+from docpipe.docx_styles import StyleResolver
+
+PROGRESS_EVERY = 100  # paragraphs between paragraphs_finished events
+
+# Single-pass escape table; str.translate never re-escapes the braces it inserts
+LATEX_ESCAPES = str.maketrans({
+    '\\': r'\textbackslash{}',
+    '&': r'\&',
+    '%': r'\%',
+    '$': r'\$',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '^': r'\^{}',
+})
 
 def escape_latex(text):
-    return text.replace('\\', r'\textbackslash{}').replace('&', r'\&').replace('%', r'\%') \
-               .replace('$', r'\$').replace('#', r'\#').replace('_', r'\_').replace('{', r'\{') \
-               .replace('}', r'\}').replace('~', r'\textasciitilde{}').replace('^', r'\^{}')
+    return text.translate(LATEX_ESCAPES)
 
 def get_alignment_env(alignment):
     if alignment == WD_ALIGN_PARAGRAPH.CENTER:
@@ -33,70 +51,114 @@ HIGHLIGHT_MAP = {
     # WD_COLOR_INDEX.DARK_GREEN does not exist
 }
 
-def docx_to_latex(docx_path, tex_path="output.tex"):
-    doc = Document(docx_path)
-
-    latex_lines = [
-        r"\documentclass[12pt]{article}",
-        r"\usepackage[utf8]{inputenc}",
-        r"\usepackage{xcolor}",
-        r"\usepackage{soul}",  # for background highlight
-        r"\usepackage{geometry}",
-        r"\usepackage{setspace}",
-        r"\usepackage{ulem}",  # for underline
-        r"\usepackage{hyperref}",
-        r"\usepackage{ragged2e}",
-        r"\geometry{margin=1in}",
-        r"\title{Converted Document}",
-        r"\author{}",
-        r"\date{}",
-        r"\begin{document}",
-        r"\maketitle",
-        r"\noindent"
-    ]
-
-    for para in doc.paragraphs:
-        alignment = get_alignment_env(para.alignment)
-        line_parts = []
-
-        for run in para.runs:
-            text = escape_latex(run.text)
-            if not text:
-                continue
-
-            # Font styling
-            if run.bold:
-                text = f"\\textbf{{{text}}}"
-            if run.italic:
-                text = f"\\textit{{{text}}}"
-            if run.underline:
-                text = f"\\uline{{{text}}}"
-
-            # Font color
-            if run.font.color and isinstance(run.font.color.rgb, RGBColor):
-                hex_color = run.font.color.rgb.__str__()
-                text = f"\\textcolor[HTML]{{{hex_color}}}{{{text}}}"
-
-            # Highlight color (background)
-            highlight = run.font.highlight_color
-            if highlight is not None and highlight in HIGHLIGHT_MAP:
-                latex_color = HIGHLIGHT_MAP[highlight]
-                text = f"\\sethlcolor{{{latex_color}}}\\hl{{{text}}}"
-
-            line_parts.append(text)
-
-        full_line = ' '.join(line_parts)
-        if full_line.strip():
-            latex_lines.append(f"\\begin{{{alignment}}}\n{full_line}\n\\end{{{alignment}}}")
+def run_format_key(run, paragraph, resolver):
+    # Effective formatting of a run, styles included; adjacent runs with equal keys are emitted as one span
+    properties = resolver.run_properties(run, paragraph)
+    highlight = properties["highlight"]
+    return (
+        properties["bold"],
+        properties["italic"],
+        properties["underline"],
+        properties["color"],
+        HIGHLIGHT_MAP.get(WD_COLOR_INDEX.from_xml(highlight)) if highlight else None,
+    )
+
+def coalesce_runs(paragraph, resolver):
+    """Merge adjacent runs of paragraph with identical formatting into (format_key, text) spans."""
+    spans = []
+    for run in paragraph.runs:
+        if not run.text:
+            continue
+        key = run_format_key(run, paragraph, resolver)
+        if spans and spans[-1][0] == key:
+            spans[-1][1].append(run.text)
         else:
-            latex_lines.append(r"\vspace{1em}")  # Blank paragraph
-
-    latex_lines.append(r"\end{document}")
+            spans.append((key, [run.text]))
+    return [(key, "".join(parts)) for key, parts in spans]
+
+def wrap_latex(text, key):
+    bold, italic, underline, color, highlight = key
+
+    # Font styling
+    if bold:
+        text = f"\\textbf{{{text}}}"
+    if italic:
+        text = f"\\textit{{{text}}}"
+    if underline:
+        text = f"\\uline{{{text}}}"
+
+    # Font color
+    if color:
+        text = f"\\textcolor[HTML]{{{color}}}{{{text}}}"
+
+    # Highlight color (background)
+    if highlight:
+        text = f"\\sethlcolor{{{highlight}}}\\hl{{{text}}}"
+
+    return text
+
+# Package setup shared by every generated file. tex_build.py precompiles everything
+# before the hyperref line into a cached format, so keep hyperref after this block.
+LATEX_FORMAT_PREAMBLE = [
+    r"\documentclass[12pt]{article}",
+    r"\usepackage[utf8]{inputenc}",
+    r"\usepackage{xcolor}",
+    r"\usepackage{soul}",  # for background highlight
+    r"\usepackage{geometry}",
+    r"\usepackage{setspace}",
+    r"\usepackage{ulem}",  # for underline
+    r"\usepackage{ragged2e}",
+    r"\geometry{margin=1in}",
+]
+
+LATEX_PREAMBLE = LATEX_FORMAT_PREAMBLE + [
+    r"\usepackage{hyperref}",  # must be loaded last and cannot be dumped into a format
+    r"\title{Converted Document}",
+    r"\author{}",
+    r"\date{}",
+    r"\begin{document}",
+    r"\maketitle",
+    r"\noindent"
+]
+
+def paragraph_to_latex(para, resolver):
+    alignment = get_alignment_env(para.alignment)
+    line_parts = [wrap_latex(escape_latex(text), key) for key, text in coalesce_runs(para, resolver)]
+    full_line = ''.join(line_parts)
+    if full_line.strip():
+        return f"\\begin{{{alignment}}}\n{full_line}\n\\end{{{alignment}}}"
+    return r"\vspace{1em}"  # Blank paragraph
+
+def emit_latex(doc, out, reporter=None):
+    """Write doc to the text stream out one paragraph at a time."""
+    reporter = reporter or Reporter()
+    resolver = StyleResolver(doc)
+    paragraphs = doc.paragraphs
+    reporter.emit("started", converter="docx_to_latex", total=len(paragraphs))
+    out.write("\n".join(LATEX_PREAMBLE))
+    for done, para in enumerate(paragraphs, 1):
+        reporter.check()
+        out.write("\n")
+        out.write(paragraph_to_latex(para, resolver))
+        if done % PROGRESS_EVERY == 0 or done == len(paragraphs):
+            reporter.emit("paragraphs_finished", done=done, total=len(paragraphs))
+    out.write("\n" + r"\end{document}")
+
+def docx_to_latex(docx_path, tex_path="output.tex", on_event=None, cancel=None):
+    # on_event / cancel: progress events and cancellation between paragraphs, see docpipe.progress
+    reporter = Reporter(on_event, cancel)
+    doc = Document(docx_path)
 
-    with open(tex_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(latex_lines))
+    try:
+        with open(tex_path, "w", encoding="utf-8") as f:
+            emit_latex(doc, f, reporter)
+    except ConversionCancelled:
+        os.remove(tex_path)  # never leave a truncated .tex behind
+        raise
 
     print(f"LaTeX file written to: {tex_path}")
+    reporter.emit("file_written", path=tex_path)
+    reporter.emit("finished")
 
 # === Example Usage ===
 if __name__ == "__main__":
@@ -0,0 +1,193 @@
+import os
+import re
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# Everything before the first of these lines is package setup that can be dumped
+# into a precompiled format. hyperref patches \begin{document} and must stay per job.
+FORMAT_STOP_RE = re.compile(r"^\s*(\\usepackage(\[[^\]]*\])?\{hyperref\}|\\begin\{document\})")
+
+_engine_versions = {}
+
+def engine_version(engine="pdflatex"):
+    if engine not in _engine_versions:
+        result = subprocess.run([engine, "--version"], capture_output=True, text=True, check=True)
+        _engine_versions[engine] = result.stdout.splitlines()[0] if result.stdout else engine
+    return _engine_versions[engine]
+
+def sha256_text(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def split_preamble(tex_source):
+    """Split a .tex source into (format_preamble, rest).
+
+    format_preamble is None when the file does not start with a \\documentclass
+    line, in which case the document is compiled without a precompiled format.
+    """
+    lines = tex_source.split("\n")
+    for index, line in enumerate(lines):
+        if FORMAT_STOP_RE.match(line):
+            head = "\n".join(lines[:index])
+            if index == 0 or not head.lstrip().startswith("\\documentclass"):
+                return None, tex_source
+            return head, "\n".join(lines[index:])
+    return None, tex_source
+
+def build_format(format_preamble, cache_dir=".latex_cache", engine="pdflatex", timeout=300):
+    """Dump format_preamble into a .fmt file, cached by preamble and engine version."""
+    fmt_name = "preamble_" + sha256_text(engine_version(engine), format_preamble)[:16]
+    fmt_dir = os.path.join(cache_dir, "formats")
+    fmt_path = os.path.join(fmt_dir, fmt_name + ".fmt")
+    if os.path.exists(fmt_path):
+        return fmt_path
+
+    os.makedirs(fmt_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="texfmt_") as work_dir:
+        with open(os.path.join(work_dir, "preamble.tex"), "w", encoding="utf-8") as f:
+            f.write(format_preamble + "\n\\dump\n")
+        subprocess.run([
+            engine, "-ini", "-interaction=nonstopmode", "-halt-on-error",
+            f"-jobname={fmt_name}", f"&{engine}", "preamble.tex"
+        ], cwd=work_dir, capture_output=True, check=True, timeout=timeout)
+        # Rename into place so concurrent builders never see a partial format
+        tmp_path = f"{fmt_path}.{os.getpid()}.tmp"
+        shutil.move(os.path.join(work_dir, fmt_name + ".fmt"), tmp_path)
+        os.replace(tmp_path, fmt_path)
+    print(f"✅ Precompiled preamble format: {fmt_path}")
+    return fmt_path
+
+def compile_tex_source(tex_source, output_pdf, fmt_path=None, engine="pdflatex", timeout=120):
+    """Compile tex_source in a private temp dir and move the PDF to output_pdf."""
+    with tempfile.TemporaryDirectory(prefix="texjob_") as work_dir:
+        command = [engine, "-interaction=nonstopmode", "-halt-on-error"]
+        if fmt_path:
+            # The format is looked up in the working directory, see TEXFORMATS
+            fmt_name = os.path.splitext(os.path.basename(fmt_path))[0]
+            try:
+                os.symlink(os.path.abspath(fmt_path), os.path.join(work_dir, fmt_name + ".fmt"))
+            except OSError:
+                shutil.copy(fmt_path, os.path.join(work_dir, fmt_name + ".fmt"))
+            command.append(f"-fmt={fmt_name}")
+            _, tex_source = split_preamble(tex_source)
+        command.append("job.tex")
+
+        with open(os.path.join(work_dir, "job.tex"), "w", encoding="utf-8") as f:
+            f.write(tex_source)
+        subprocess.run(command, cwd=work_dir, capture_output=True, check=True, timeout=timeout)
+
+        tmp_path = f"{output_pdf}.{os.getpid()}.tmp"
+        shutil.move(os.path.join(work_dir, "job.pdf"), tmp_path)
+        os.replace(tmp_path, output_pdf)
+    return output_pdf
+
+def _unique_path(path, taken):
+    # a/x.tex and b/x.tex would both build output_dir/x.pdf; later ones become x_2.pdf, x_3.pdf, ...
+    stem, ext = os.path.splitext(path)
+    candidate, n = path, 1
+    while os.path.normcase(os.path.abspath(candidate)).lower() in taken:
+        n += 1
+        candidate = f"{stem}_{n}{ext}"
+    taken.add(os.path.normcase(os.path.abspath(candidate)).lower())
+    return candidate
+
+def build_pdfs(tex_paths, output_dir=None, cache_dir=".latex_cache", workers=None,
+               engine="pdflatex", timeout=120, use_format=True):
+    """Compile many .tex files to PDF in a bounded thread pool.
+
+    Each compilation runs in its own temp dir. PDFs are cached by a hash of the
+    .tex content, so unchanged sources are copied from the cache instead of rebuilt.
+    Sources with the same name get numbered PDFs in output_dir (x.pdf, x_2.pdf).
+    Returns {tex_path: pdf_path or None on failure}.
+    """
+    if shutil.which(engine) is None:
+        raise FileNotFoundError(f"{engine} not found on PATH")
+
+    workers = workers or os.cpu_count() or 1
+    pdf_cache_dir = os.path.join(cache_dir, "pdf")
+    os.makedirs(pdf_cache_dir, exist_ok=True)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    formats = {}
+    taken = set()
+    for tex_path in tex_paths:
+        with open(tex_path, "r", encoding="utf-8") as f:
+            tex_source = f.read()
+        format_preamble, _ = split_preamble(tex_source) if use_format else (None, tex_source)
+        if format_preamble is not None:
+            formats.setdefault(format_preamble, None)
+        pdf_name = os.path.splitext(os.path.basename(tex_path))[0] + ".pdf"
+        output_pdf = _unique_path(os.path.join(output_dir or os.path.dirname(tex_path) or ".", pdf_name), taken)
+        cache_key = sha256_text(engine_version(engine), tex_source)
+        jobs.append((tex_path, tex_source, format_preamble, output_pdf, cache_key))
+
+    # Build each distinct format once, before any job needs it
+    for format_preamble in formats:
+        try:
+            formats[format_preamble] = build_format(format_preamble, cache_dir, engine)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+            print(f"⚠️ Could not precompile preamble, compiling from scratch: {e}")
+
+    def run_job(job):
+        tex_path, tex_source, format_preamble, output_pdf, cache_key = job
+        cached_pdf = os.path.join(pdf_cache_dir, cache_key + ".pdf")
+        if os.path.exists(cached_pdf):
+            shutil.copyfile(cached_pdf, output_pdf)
+            return tex_path, output_pdf
+        try:
+            compile_tex_source(tex_source, output_pdf, formats.get(format_preamble), engine, timeout)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+            print(f"❌ LaTeX build failed for {tex_path}: {e}")
+            return tex_path, None
+        # Two jobs with identical sources may finish together; give each its own temp name
+        tmp_path = f"{cached_pdf}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(output_pdf, tmp_path)
+        os.replace(tmp_path, cached_pdf)
+        return tex_path, output_pdf
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = dict(pool.map(run_job, jobs))
+
+    built = sum(1 for pdf in results.values() if pdf)
+    print(f"✅ Built {built}/{len(results)} PDF(s)")
+    return results
+
+def build_pdf(tex_path, output_pdf=None, cache_dir=".latex_cache", engine="pdflatex", timeout=120):
+    output_dir = os.path.dirname(output_pdf) if output_pdf else None
+    pdf_path = build_pdfs([tex_path], output_dir, cache_dir, 1, engine, timeout)[tex_path]
+    if pdf_path and output_pdf and os.path.abspath(pdf_path) != os.path.abspath(output_pdf):
+        os.replace(pdf_path, output_pdf)
+        pdf_path = output_pdf
+    return pdf_path
+
+def iter_tex_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(".tex"):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile generated .tex files to PDF.")
+    parser.add_argument("paths", nargs="+", help=".tex files or directories")
+    parser.add_argument("-o", "--output-dir", help="directory for PDFs (default: next to each .tex)")
+    parser.add_argument("--cache-dir", default=".latex_cache")
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=int, default=120, help="per-job timeout in seconds")
+    parser.add_argument("--no-format", action="store_true", help="do not use a precompiled preamble")
+    args = parser.parse_args()
+
+    build_pdfs(list(iter_tex_paths(args.paths)), args.output_dir, args.cache_dir, args.workers,
+               timeout=args.timeout, use_format=not args.no_format)